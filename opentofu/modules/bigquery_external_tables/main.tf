@@ -18,65 +18,44 @@ resource "google_bigquery_dataset" "raw" {
   depends_on = [google_project_service.bigquery]
 }
 
+# Enable BigQuery Connection API, required by Delta Lake tables
+resource "google_project_service" "bigquery_connection" {
+  service = "bigqueryconnection.googleapis.com"
+}
+
+# Cloud resource connection used by BigQuery to read Delta Lake tables
+resource "google_bigquery_connection" "data_bucket" {
+  connection_id = "data-bucket"
+  friendly_name = "Data bucket"
+  description   = "Connection used to read Delta Lake tables in GCS"
+  location      = var.region
+  cloud_resource {}
+
+  depends_on = [google_project_service.bigquery_connection]
+}
+
+resource "google_storage_bucket_iam_member" "data_bucket_connection_viewer" {
+  bucket = var.data_bucket_name
+  role   = "roles/storage.objectViewer"
+  member = "serviceAccount:${google_bigquery_connection.data_bucket.cloud_resource[0].service_account_id}"
+}
+
 # External table for expenses
+# The Notion pipeline merges expenses incrementally into a Delta Lake table,
+# the schema is read from the Delta Lake transaction log
 resource "google_bigquery_table" "expenses" {
   dataset_id          = google_bigquery_dataset.raw.dataset_id
   table_id            = "expenses"
   deletion_protection = false
 
   external_data_configuration {
-    autodetect    = false
-    source_format = "PARQUET"
-    source_uris   = ["${local.gcs_path_prefix}/expenses/data.parquet"]
-
-    schema = jsonencode([
-      { name = "object", type = "STRING", mode = "NULLABLE" },
-      { name = "id", type = "STRING", mode = "NULLABLE" },
-      { name = "created_time", type = "TIMESTAMP", mode = "NULLABLE" },
-      { name = "last_edited_time", type = "TIMESTAMP", mode = "NULLABLE" },
-      { name = "created_by__object", type = "STRING", mode = "NULLABLE" },
-      { name = "created_by__id", type = "STRING", mode = "NULLABLE" },
-      { name = "last_edited_by__object", type = "STRING", mode = "NULLABLE" },
-      { name = "last_edited_by__id", type = "STRING", mode = "NULLABLE" },
-      { name = "parent__type", type = "STRING", mode = "NULLABLE" },
-      { name = "parent__database_id", type = "STRING", mode = "NULLABLE" },
-      { name = "archived", type = "BOOL", mode = "NULLABLE" },
-      { name = "in_trash", type = "BOOL", mode = "NULLABLE" },
-      { name = "properties__amount_brl__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount_brl__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount__number", type = "FLOAT64", mode = "NULLABLE" },
-      { name = "properties__mean__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__mean__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__credit__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__credit__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__credit__checkbox", type = "BOOL", mode = "NULLABLE" },
-      { name = "properties__category__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__category__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__category__select__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__category__select__name", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__category__select__color", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__debit_credit__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__debit_credit__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__debit_credit__formula__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__debit_credit__formula__number", type = "FLOAT64", mode = "NULLABLE" },
-      { name = "properties__date__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__date__type", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__date__date__start", type = "DATE", mode = "NULLABLE" },
-      { name = "properties__name__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__name__type", type = "STRING", mode = "NULLABLE" },
-      { name = "url", type = "STRING", mode = "NULLABLE" },
-      { name = "public_url", type = "STRING", mode = "NULLABLE" },
-      { name = "_dlt_load_id", type = "STRING", mode = "NULLABLE" },
-      { name = "_dlt_id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount_brl__number", type = "FLOAT64", mode = "NULLABLE" },
-      { name = "properties__mean__select__id", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__mean__select__name", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__mean__select__color", type = "STRING", mode = "NULLABLE" },
-      { name = "properties__amount_brl__number__v_double", type = "FLOAT64", mode = "NULLABLE" }
-    ])
+    autodetect    = true
+    source_format = "DELTA_LAKE"
+    connection_id = google_bigquery_connection.data_bucket.name
+    source_uris   = ["${local.gcs_path_prefix}/expenses"]
   }
+
+  depends_on = [google_storage_bucket_iam_member.data_bucket_connection_viewer]
 }
 
 # External table for monthly_category_amounts
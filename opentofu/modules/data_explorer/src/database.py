@@ -1,6 +1,9 @@
 import datetime
+import glob
+import hashlib
 import os
-from typing import Optional
+import threading
+from typing import List, Tuple
 
 import duckdb
 import streamlit as st
@@ -9,18 +12,43 @@ import streamlit as st
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
 HMAC_ACCESS_ID = os.getenv("HMAC_ACCESS_ID")
 HMAC_SECRET = os.getenv("HMAC_SECRET")
+# directory of the local cache database, in memory on Cloud Run
+DUCKDB_CACHE_DIR = os.getenv("DUCKDB_CACHE_DIR", "/tmp/data_explorer")
+
+# tables copied into the local cache database -> their object in the bucket
+CACHED_TABLES = {
+    "mart.expenses_eur": "mart/expenses_eur/data.parquet",
+    "mart.monthly_category_budget": "mart/monthly_category_budget/data.parquet",
+}
+
+# the bucket connection is shared, cache databases are built one at a time
+_cache_lock = threading.Lock()
 
 
 # --- DATABASE CONNECTION ---
-@st.cache_resource(ttl=datetime.timedelta(hours=1), max_entries=2)
-def get_duckdb_memory(session_id: Optional[str] = None) -> duckdb.DuckDBPyConnection:
+@st.cache_resource(ttl=datetime.timedelta(minutes=5))
+def get_duckdb_cache() -> duckdb.DuckDBPyConnection:
     """
-    Set a caching resource which will be refreshed
-     - either at each hour
-     - either at each third call
-     - either when the connection is established for a new session_id
+    Set a caching resource shared by all sessions: a read-only connection to
+    the local cache database of the current bucket objects.
+    Every 5 minutes the objects are listed again, and the cache database is
+    only rebuilt when one of them changed since it was copied.
     """
+    with _cache_lock:
+        bucket_conn = get_duckdb_bucket()
+        cache_path = get_cache_path(list_cached_objects(bucket_conn))
+        if not os.path.exists(cache_path):
+            build_cache(bucket_conn, cache_path)
+
+    return duckdb.connect(cache_path, read_only=True)
 
+
+@st.cache_resource
+def get_duckdb_bucket() -> duckdb.DuckDBPyConnection:
+    """
+    Set a caching resource holding the in-memory connection to the bucket,
+    used to list the cached objects and to copy them into the cache database.
+    """
     duckdb_conn = duckdb.connect()
     prepare_duckdb(duckdb_conn=duckdb_conn)
 
@@ -43,3 +71,59 @@ def prepare_duckdb(duckdb_conn: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyCon
     # Execute the script
     duckdb_conn.execute(sql_script)
     return duckdb_conn
+
+
+def list_cached_objects(
+    duckdb_conn: duckdb.DuckDBPyConnection,
+) -> List[Tuple[str, datetime.datetime, int]]:
+    """
+    List the name, last modified time and size of the cached objects, read
+    from their metadata only. A new generation of an object is a new upload,
+    which changes its last modified time.
+    """
+    object_urls = [
+        f"gcs://{GCS_BUCKET_NAME}/{object_name}"
+        for object_name in CACHED_TABLES.values()
+    ]
+    return duckdb_conn.execute(
+        "SELECT filename, last_modified, size FROM read_blob(?) ORDER BY filename",
+        [object_urls],
+    ).fetchall()
+
+
+def get_cache_path(objects: List[Tuple[str, datetime.datetime, int]]) -> str:
+    """
+    Name the cache database after the objects it copies, so that a changed
+    object gives a new database instead of overwriting the one being read.
+    """
+    fingerprint = hashlib.sha256(repr(objects).encode()).hexdigest()[:16]
+    return os.path.join(DUCKDB_CACHE_DIR, f"cache_{fingerprint}.duckdb")
+
+
+def build_cache(bucket_conn: duckdb.DuckDBPyConnection, cache_path: str) -> None:
+    """
+    Copy the cached tables from the bucket into a new cache database, then
+    remove the databases of previous objects.
+    """
+    os.makedirs(DUCKDB_CACHE_DIR, exist_ok=True)
+    # written under a temporary name, readers only open complete databases
+    tmp_path = f"{cache_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    bucket_conn.execute(f"ATTACH '{tmp_path}' AS cache")
+    try:
+        for table_name in CACHED_TABLES:
+            schema_name = table_name.split(".")[0]
+            bucket_conn.execute(f"CREATE SCHEMA IF NOT EXISTS cache.{schema_name}")
+            bucket_conn.execute(
+                f"CREATE TABLE cache.{table_name} AS SELECT * FROM {table_name}"
+            )
+    finally:
+        bucket_conn.execute("DETACH cache")
+    os.replace(tmp_path, cache_path)
+
+    # sessions still reading a previous database keep their open file
+    for previous_path in glob.glob(os.path.join(DUCKDB_CACHE_DIR, "cache_*.duckdb")):
+        if previous_path != cache_path:
+            os.remove(previous_path)
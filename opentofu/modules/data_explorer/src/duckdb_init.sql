@@ -1,11 +1,15 @@
 -- DuckDB Initialization Script
--- This script sets up GCS access and creates views for parquet files
+-- This script sets up GCS access and creates views for parquet files and delta tables
 -- Variables will be substituted by envsubst or Python string formatting
 
 -- Install and load httpfs extension
 INSTALL httpfs;
 LOAD httpfs;
 
+-- Install and load delta extension, used for tables merged incrementally
+INSTALL delta;
+LOAD delta;
+
 -- Create GCS secret using environment variable placeholders
 -- $SECRET_TYPE will be substituted with either "SECRET" or "PERSISTENT SECRET"
 CREATE $SECRET_TYPE (TYPE GCS, KEY_ID '$HMAC_ACCESS_ID', SECRET '$HMAC_SECRET', SCOPE 'gcs://$GCS_BUCKET_NAME');
@@ -14,8 +18,9 @@ CREATE $SECRET_TYPE (TYPE GCS, KEY_ID '$HMAC_ACCESS_ID', SECRET '$HMAC_SECRET',
 CREATE SCHEMA IF NOT EXISTS raw;
 
 -- Create views using bucket name placeholder
+-- Expenses are partitioned by date_month, filters on it only scan the files of the matching months
 CREATE OR REPLACE VIEW raw.expenses AS
-SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/raw/expenses/data.parquet');
+SELECT * FROM delta_scan('gcs://$GCS_BUCKET_NAME/raw/expenses');
 
 CREATE OR REPLACE VIEW raw.monthly_category_amounts AS
 SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/raw/monthly_category_amounts/data.parquet');
@@ -23,5 +28,11 @@ SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/raw/monthly_category_amounts/
 CREATE OR REPLACE VIEW raw.rate AS
 SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/raw/rate/data.parquet');
 
-CREATE OR REPLACE VIEW raw.expenses__properties__name__title AS
-SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/raw/expenses__properties__name__title/data.parquet');
+-- Create mart schema, tables derived from the raw ones by the Notion pipeline after each load
+CREATE SCHEMA IF NOT EXISTS mart;
+
+CREATE OR REPLACE VIEW mart.expenses_eur AS
+SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/mart/expenses_eur/data.parquet');
+
+CREATE OR REPLACE VIEW mart.monthly_category_budget AS
+SELECT * FROM read_parquet('gcs://$GCS_BUCKET_NAME/mart/monthly_category_budget/data.parquet');
@@ -2,7 +2,7 @@ import datetime
 
 import plotly.graph_objects as go
 import streamlit as st
-from database import get_duckdb_memory
+from database import get_duckdb_cache
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -15,76 +15,38 @@ st.title("💰 Tracker")
 # DATABASE CONNECTION
 # ============================================================================
 
-duckdb_conn = get_duckdb_memory()
+duckdb_conn = get_duckdb_cache()
 
 # ============================================================================
 # DATA PREPARATION - Using DuckDB Relational API
 # ============================================================================
-# Note: DuckDB automatically caches external files, so we don't need to cache
-# the base data loading. We only cache computed/aggregated results.
+# Note: the tables are read from the local cache database, so we don't need to
+# cache the base data loading. We only cache computed/aggregated results.
 
 
 def prepare_base_expenses():
     """
-    Prepare base expenses data with currency conversion.
-    Uses SQL for ASOF JOIN as it's not directly available in relational API.
+    Load expenses converted to EUR from the mart built by the Notion pipeline.
+    The ASOF JOIN on rates and the credit sign are applied at load time.
     Returns a DuckDB relation (not materialized).
     """
-    return duckdb_conn.sql("""
-        SELECT
-            date:properties__date__date__start,
-            category:properties__category__select__name,
-            name:text__content,
-            date_month:strftime(properties__date__date__start, '%Y-%m'),
-            amount: ROUND(
-                IF(properties__credit__checkbox, -1, 1) *
-                COALESCE(properties__amount__number, properties__amount_brl__number / eur_brl),
-                2
-            )
-        FROM raw.expenses expenses
-        LEFT JOIN raw.expenses__properties__name__title title
-            ON title._dlt_parent_id = expenses._dlt_id
-        ASOF JOIN raw.rate
-            ON properties__date__date__start >= raw.rate.date
-    """)
+    return duckdb_conn.sql("SELECT * FROM mart.expenses_eur")
 
 
-def prepare_monthly_budget():
+def prepare_monthly_category_budget():
     """
-    Load monthly budget data from raw source.
+    Load the budget, expenses and remaining budget of each month and category
+    from the mart built by the Notion pipeline.
     Returns a DuckDB relation (not materialized).
     """
-    return duckdb_conn.sql("""
-        SELECT
-            date_month:strftime(month, '%Y-%m'),
-            category,
-            budget:ROUND(budget_eur, 2)
-        FROM raw.monthly_category_amounts
-    """)
+    return duckdb_conn.sql("SELECT * FROM mart.monthly_category_budget")
 
 
 # Load base data - these remain as DuckDB relations (lazy evaluation)
-# DuckDB's external file cache handles the underlying data caching
+# The local cache database holds the underlying data
 expenses = prepare_base_expenses()
 expenses_without_allowances = expenses.filter("category NOT LIKE 'Allowance%'")
-monthly_budget = prepare_monthly_budget()
-
-# Build data transformations - these are still DuckDB relations (lazy)
-# Aggregate expenses by month and category
-monthly_expenses = expenses.aggregate(
-    "date_month, category, amount: SUM(amount)"
-).select("date_month, category, amount")
-
-# Join budget with expenses to calculate remaining budget
-monthly_category_budget_and_expenses = monthly_budget.join(
-    monthly_expenses, condition="date_month, category", how="left"
-).select("""
-        date_month,
-        category,
-        budget,
-        expenses: COALESCE(amount, 0),
-        remaining_budget: ROUND(COALESCE(budget, 0) - COALESCE(amount, 0),2)
-    """)
+monthly_category_budget_and_expenses = prepare_monthly_category_budget()
 
 # Filter out allowances for main budget tracking
 monthly_category_budget_and_expenses_without_allowances = (
@@ -95,7 +57,7 @@ monthly_category_budget_and_expenses_without_allowances = (
 # CACHED COMPUTATIONS
 # ============================================================================
 # We cache computed results that aggregate data or involve expensive operations.
-# Base data doesn't need caching as DuckDB handles external file caching.
+# Base data doesn't need caching as it is read from the local cache database.
 
 
 @st.cache_resource(ttl=datetime.timedelta(hours=1))
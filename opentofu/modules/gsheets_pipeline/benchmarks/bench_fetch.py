@@ -0,0 +1,128 @@
+"""Benchmarks fetching Google Sheets ranges against a local stub server.
+
+Fetches the values, headers and data types of the `Data` and `Rate` ranges
+once with the three requests of the default path (sheet names, values and
+metadata of the first two rows), once with the single grid data request
+of `fetch_grid_data=True` and once in windows of `--chunk-size` rows like
+`chunk_size` does, after reading the grid size of the sheets. Reports the
+requests, bytes and time of each.
+
+Usage:
+    uv run --directory=opentofu/modules/gsheets_pipeline/src python ../benchmarks/bench_fetch.py
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httplib2
+from googleapiclient.discovery import build
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google_sheets.helpers import api_calls  # noqa: E402
+from stub_server import StubSheetsServer, make_sheets  # noqa: E402
+
+SPREADSHEET_ID = "benchmark"
+RANGE_NAMES = ["Data", "Rate"]
+MAX_CONCURRENCY = 4
+
+
+def build_service(url: str) -> Any:
+    return build(
+        "sheets",
+        "v4",
+        http=httplib2.Http(),
+        client_options={"api_endpoint": url},
+        static_discovery=True,
+    )
+
+
+def fetch_in_three_requests(service: Any, url: str) -> None:
+    api_calls.get_known_range_names(SPREADSHEET_ID, service)
+    range_data = api_calls.get_data_for_ranges(service, SPREADSHEET_ID, RANGE_NAMES)
+    api_calls.get_meta_for_ranges(
+        service, SPREADSHEET_ID, [str(meta_range) for _, _, meta_range, _ in range_data]
+    )
+
+
+def fetch_grid_data(service: Any, url: str) -> None:
+    api_calls.get_grid_data_for_ranges(service, SPREADSHEET_ID, RANGE_NAMES)
+
+
+def fetch_in_windows(service: Any, url: str, chunk_size: int) -> None:
+    api_calls.get_known_range_names(SPREADSHEET_ID, service)
+    bounds = api_calls.get_range_bounds(service, SPREADSHEET_ID, RANGE_NAMES)
+    windows = [
+        range_bounds.split_rows(chunk_size) for range_bounds in bounds if range_bounds
+    ]
+    range_data = api_calls.get_data_for_ranges(
+        service, SPREADSHEET_ID, [str(range_windows[0]) for range_windows in windows]
+    )
+    api_calls.get_meta_for_ranges(
+        service, SPREADSHEET_ID, [str(meta_range) for _, _, meta_range, _ in range_data]
+    )
+    # the next windows are fetched by worker threads, each with its own service
+    for range_windows in windows:
+        for _ in api_calls.get_windows_values(
+            lambda: build_service(url),
+            SPREADSHEET_ID,
+            range_windows[1:],
+            MAX_CONCURRENCY,
+        ):
+            pass
+
+
+def run(
+    name: str,
+    fetch: Callable[[Any, str], None],
+    sheets: Dict[str, List[List[Any]]],
+    latency: float,
+    repeat: int,
+) -> Dict[str, Any]:
+    with StubSheetsServer(sheets, latency=latency) as server:
+        service = build_service(server.url)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch(service, server.url)
+            timings.append(time.perf_counter() - started)
+        return {
+            "name": name,
+            "requests": server.requests // repeat,
+            "bytes": server.bytes // repeat,
+            "elapsed": statistics.median(timings),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="server latency in seconds"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=2_000)
+    args = parser.parse_args()
+
+    sheets = make_sheets(args.rows, args.columns)
+    print(f"{'mode':<20}{'requests':>10}{'kB':>10}{'median ms':>12}")
+    for name, fetch in [
+        ("three requests", fetch_in_three_requests),
+        ("grid data", fetch_grid_data),
+        ("windows", partial(fetch_in_windows, chunk_size=args.chunk_size)),
+    ]:
+        result = run(name, fetch, sheets, args.latency, args.repeat)
+        print(
+            f"{result['name']:<20}{result['requests']:>10}"
+            f"{result['bytes'] / 1000:>10.0f}{result['elapsed'] * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmarks trimming a range and column arithmetic, in allocations and time.
+
+Trims a range of `--rows` rows by `--columns` columns with an empty row and
+two empty columns at the top left, once by slicing every row like the
+previous `trim_range_top_left` did and once in place with the current one.
+Then parses range notations and shifts columns `--calls` times with the
+previous per call arithmetic and with the cached one. Reports the memory
+allocated at peak (tracemalloc) and the time of each.
+
+Usage:
+    uv run --directory=opentofu/modules/gsheets_pipeline/src python ../benchmarks/bench_trim.py
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from google_sheets.helpers.data_processing import (  # noqa: E402
+    RE_PARSE_RANGE,
+    ParsedRange,
+    trim_range_top_left,
+)
+
+PADDING = 2
+
+
+def make_values(rows: int, columns: int) -> List[List[Any]]:
+    values: List[List[Any]] = [[]]
+    values.append([""] * PADDING + [f"Column {col}" for col in range(columns)])
+    for idx in range(rows):
+        values.append([""] * PADDING + [idx * 0.5 + col for col in range(columns)])
+    return values
+
+
+def shift_column_per_call(col: str, shift: int) -> str:
+    col_num = 0
+    for i, char in enumerate(reversed(col)):
+        col_num += (ord(char.upper()) - 65 + 1) * (26**i)
+    col_num += shift
+    col_str = ""
+    while col_num > 0:
+        col_num, remainder = divmod(col_num - 1, 26)
+        col_str = chr(65 + remainder) + col_str
+    return col_str
+
+
+def trim_by_slicing(
+    parsed_range: ParsedRange, range_values: List[List[Any]]
+) -> Tuple[ParsedRange, List[List[Any]]]:
+    shift_x = 0
+    for row in range_values:
+        if row:
+            break
+        shift_x += 1
+    if shift_x > 0:
+        range_values = range_values[shift_x:]
+    shift_y = 0
+    for col in range_values[0]:
+        if col == "":
+            shift_y += 1
+        else:
+            break
+    if shift_y > 0:
+        for idx, row in enumerate(range_values):
+            range_values[idx] = row[shift_y:]
+    parsed_range = parsed_range._replace(
+        start_row=parsed_range.start_row + shift_x,
+        start_col=shift_column_per_call(parsed_range.start_col, shift_y),
+    )
+    return parsed_range, range_values
+
+
+def parse_per_call(notation: str) -> ParsedRange:
+    match = RE_PARSE_RANGE.match(notation)
+    assert match
+    return ParsedRange(
+        match["sheet"].strip("'"),
+        match["start_col"],
+        int(match["start_row"]),
+        match["end_col"],
+        int(match["end_row"]),
+    )
+
+
+def arithmetic_per_call(calls: int) -> None:
+    for idx in range(calls):
+        parsed_range = parse_per_call(f"Data!A{idx % 1000 + 1}:AD{idx % 1000 + 500}")
+        shift_column_per_call(parsed_range.start_col, idx % 30)
+
+
+def arithmetic_cached(calls: int) -> None:
+    for idx in range(calls):
+        parsed_range = ParsedRange.parse_range(
+            f"Data!A{idx % 1000 + 1}:AD{idx % 1000 + 500}"
+        )
+        ParsedRange.shift_column(parsed_range.start_col, idx % 30)
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[int, float]:
+    """Returns the peak of memory allocated by `fn` in bytes and its time in seconds"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    del result
+    return peak, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    parsed_range = ParsedRange.parse_range(
+        f"Data!A1:{shift_column_per_call('A', args.columns + PADDING - 1)}{args.rows + 2}"
+    )
+    print(f"{'benchmark':<32}{'peak kB':>12}{'ms':>10}")
+    for name, fn in [
+        ("trim, slicing rows", lambda values: trim_by_slicing(parsed_range, values)),
+        ("trim, in place", lambda values: trim_range_top_left(parsed_range, values)),
+    ]:
+        values = make_values(args.rows, args.columns)
+        peak, elapsed = measure(lambda: fn(values))
+        print(f"{name:<32}{peak / 1000:>12.0f}{elapsed * 1000:>10.1f}")
+    for name, arithmetic in [
+        ("columns, per call", arithmetic_per_call),
+        ("columns, cached", arithmetic_cached),
+    ]:
+        peak, elapsed = measure(lambda: arithmetic(args.calls))
+        print(f"{name:<32}{peak / 1000:>12.0f}{elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
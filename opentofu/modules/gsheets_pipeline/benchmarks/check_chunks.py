@@ -0,0 +1,107 @@
+"""Checks chunked extraction of ranges against a local stub server.
+
+Extracts the sheets of a synthetic spreadsheet with `google_spreadsheet` in
+windows of `--chunk-size` rows and at once, in both data formats, and fails
+unless both give the same rows. Besides the `Data` and `Rate` sheets of the
+benchmarks, a `Sparse` sheet has its first window holding only the headers
+and a `Headers` sheet holds nothing else.
+
+Usage:
+    uv run --directory=opentofu/modules/gsheets_pipeline/src python ../benchmarks/check_chunks.py
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import dlt
+import httplib2
+from googleapiclient.discovery import build
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import google_sheets  # noqa: E402
+from stub_server import StubSheetsServer, make_sheets  # noqa: E402
+
+SPREADSHEET_ID = "check"
+# resolved by dlt but never used, services are not authenticated
+CREDENTIALS = {
+    "project_id": "check",
+    "client_email": "check@check.iam.gserviceaccount.com",
+    "private_key": "check",
+}
+
+
+def make_check_sheets(rows: int, chunk_size: int) -> Dict[str, List[List[Any]]]:
+    sheets = make_sheets(rows, 4)
+    data = sheets["Data"]
+    # the data starts after two windows of empty rows
+    sheets["Sparse"] = [data[0]] + [[] for _ in range(chunk_size * 2)] + data[1:]
+    sheets["Headers"] = [data[0]]
+    return sheets
+
+
+def fetch(
+    url: str, data_format: str, chunk_size: Optional[int]
+) -> Dict[str, List[Any]]:
+    """Extracts all sheets and returns the rows of each range"""
+    # services are pointed at the stub server instead of being authenticated
+    google_sheets.api_auth = lambda *args, **kwargs: build(
+        "sheets",
+        "v4",
+        http=httplib2.Http(),
+        client_options={"api_endpoint": url},
+        static_discovery=True,
+    )
+    fetched: Dict[str, List[Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # the source reads the state of the active pipeline
+        dlt.pipeline(pipeline_name="check_chunks", pipelines_dir=tmp_dir)
+        source = google_sheets.google_spreadsheet(
+            SPREADSHEET_ID,
+            range_names=[],
+            credentials=CREDENTIALS,
+            get_sheets=True,
+            get_named_ranges=False,
+            data_format=data_format,
+            chunk_size=chunk_size,
+        )
+        for name, resource in source.resources.items():
+            fetched[name] = []
+            # rows are iterated one by one, Arrow tables as a whole
+            for item in resource:
+                if isinstance(item, dict):
+                    fetched[name].append(item)
+                else:
+                    fetched[name].extend(item.to_pylist())
+    return fetched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    failed: List[str] = []
+    sheets = make_check_sheets(args.rows, args.chunk_size)
+    with StubSheetsServer(sheets) as server:
+        for data_format in ("object", "arrow"):
+            expected = fetch(server.url, data_format, None)
+            chunked = fetch(server.url, data_format, args.chunk_size)
+            for name in sheets:
+                rows = chunked.get(name, [])
+                print(f"{data_format:<8}{name:<10}{len(rows):>8} rows")
+                # the sparse sheet holds all the rows of the data sheet
+                all_rows = name != "Sparse" or len(rows) == args.rows
+                if rows != expected.get(name, []) or not all_rows:
+                    failed.append(f"{data_format} {name}")
+
+    if failed:
+        sys.exit(f"Ranges not giving the same rows in windows and at once: {failed}")
+
+
+if __name__ == "__main__":
+    main()
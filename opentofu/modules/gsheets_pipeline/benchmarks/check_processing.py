@@ -0,0 +1,137 @@
+"""Checks the data type inference of ranges and skipping unchanged spreadsheets.
+
+Runs `infer_data_types` on small ranges covering numbers, booleans, text and
+date columns, including date columns mixing serial numbers and text, and
+fails unless every case gives the expected data types. Then loads a sheet of
+a local stub server with `skip_unchanged` and `check_modified_time`, edits
+another sheet and loads twice more, and fails if the last run requests any
+values: the new modification time must be stored although nothing was loaded.
+Run it after changing the inference or the state of the source.
+
+Usage:
+    uv run --directory=opentofu/modules/gsheets_pipeline/src python ../benchmarks/check_processing.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import dlt
+import httplib2
+from googleapiclient.discovery import build
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dlt.common.data_types import TDataType  # noqa: E402
+import google_sheets  # noqa: E402
+from google_sheets.helpers.data_processing import infer_data_types  # noqa: E402
+from stub_server import StubSheetsServer, make_sheets  # noqa: E402
+
+# name -> (values without the header row, data types from the metadata, expected)
+CASES: List[
+    Tuple[str, List[List[Any]], List[Optional[TDataType]], List[Optional[TDataType]]]
+] = [
+    ("numbers", [[1, 1.5], [2, 3]], [None, None], ["double", "double"]),
+    ("booleans and text", [[True, "a"], [False, "b"]], [None, None], ["bool", "text"]),
+    ("numbers and text", [[1, "a"], ["b", 2]], [None, None], ["text", "text"]),
+    ("empty column", [[1, ""], [2, ""]], [None, None], ["double", None]),
+    (
+        "dates",
+        [[45000, 45000.5], [45001, ""]],
+        ["date", "timestamp"],
+        ["date", "timestamp"],
+    ),
+    (
+        "dates and text",
+        [[45000, "a"], ["N/A", "b"], [45001, "c"]],
+        ["date", None],
+        ["text", "text"],
+    ),
+    ("timestamps and booleans", [[45000.5], [True]], ["timestamp"], ["text"]),
+]
+
+
+VALUES_METHODS = ("values.get", "values.batchGet")
+# resolved by dlt but never used, services are not authenticated
+CREDENTIALS = {
+    "project_id": "check",
+    "client_email": "check@check.iam.gserviceaccount.com",
+    "private_key": "check",
+}
+
+
+def stub_service(url: str, api: str, version: str) -> Any:
+    return build(
+        api,
+        version,
+        http=httplib2.Http(),
+        client_options={"api_endpoint": url},
+        static_discovery=True,
+    )
+
+
+def count_values_requests(server: StubSheetsServer) -> int:
+    return sum(server.requests_by_method.get(method, 0) for method in VALUES_METHODS)
+
+
+def check_unchanged_runs() -> List[int]:
+    """Loads the `Data` sheet three times, editing the `Rate` sheet after the
+    first run, and returns the values requests made by each run"""
+    values_requests = []
+    with (
+        StubSheetsServer(make_sheets(100, 4)) as server,
+        tempfile.TemporaryDirectory() as tmp_dir,
+    ):
+        # services are pointed at the stub server instead of being authenticated
+        google_sheets.api_auth = lambda *args, **kwargs: stub_service(
+            server.url, "sheets", "v4"
+        )
+        google_sheets.drive_auth = lambda *args, **kwargs: stub_service(
+            server.url, "drive", "v3"
+        )
+        pipeline = dlt.pipeline(
+            pipeline_name="check_processing",
+            pipelines_dir=f"{tmp_dir}/pipelines",
+            destination=dlt.destinations.filesystem(f"file://{tmp_dir}/bucket"),
+            dataset_name="sheets",
+        )
+        for run in range(3):
+            if run == 1:
+                server.sheets["Rate"][1][1] += 1
+                server.modified_time = "2023-01-02T00:00:00.000Z"
+            before = count_values_requests(server)
+            pipeline.run(
+                google_sheets.google_spreadsheet(
+                    "check",
+                    range_names=["Data"],
+                    credentials=CREDENTIALS,
+                    get_named_ranges=False,
+                    skip_unchanged=True,
+                    check_modified_time=True,
+                )
+            )
+            values_requests.append(count_values_requests(server) - before)
+    return values_requests
+
+
+def main() -> None:
+    failed: List[str] = []
+    for name, values, data_types, expected in CASES:
+        headers = [f"column_{idx}" for idx in range(len(expected))]
+        inferred = infer_data_types(values, headers, data_types)
+        print(f"{name:<28}{inferred}")
+        if inferred != expected:
+            failed.append(f"{name}: expected {expected}")
+
+    if failed:
+        sys.exit("Unexpected data types:\n" + "\n".join(failed))
+
+    values_requests = check_unchanged_runs()
+    print(f"{'values requests by run':<28}{values_requests}")
+    if values_requests[-1]:
+        sys.exit("The spreadsheet was read again although it did not change")
+
+
+if __name__ == "__main__":
+    main()
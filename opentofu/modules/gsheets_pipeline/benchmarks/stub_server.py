@@ -0,0 +1,239 @@
+"""A local stand-in for the Google Sheets API used by the benchmarks.
+
+Serves a synthetic spreadsheet through `spreadsheets.get`, with or without
+grid data and with the grid size of each sheet, `spreadsheets.values.get` and
+`spreadsheets.values.batchGet`, and the modification time of the spreadsheet
+through the `files.get` method of Google Drive. Counts the requests and bytes
+it serves, and latency can be injected to emulate the round trips to Google.
+
+Ranges are either sheet names or ranges in A1 notation prefixed with a sheet
+name. Like Google, values leave out the empty rows at the end of a range.
+Field masks are not applied, except that formatted values are left out of
+grid data when they are not requested.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# serial number of 2023-01-01
+FIRST_DATE = 44927
+# grid size of a new sheet, sheets holding more values are as large as them
+GRID_ROWS = 1000
+GRID_COLUMNS = 26
+RE_RANGE = re.compile(
+    r"^(?P<sheet>[^!]+)!(?P<c1>[A-Z]+)(?P<r1>\d+):(?P<c2>[A-Z]+)(?P<r2>\d+)$"
+)
+
+
+def column_number(col: str) -> int:
+    number = 0
+    for char in col:
+        number = number * 26 + ord(char) - 64
+    return number
+
+
+def column_letter(number: int) -> str:
+    col = ""
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        col = chr(65 + remainder) + col
+    return col
+
+
+def make_sheets(rows: int, columns: int) -> Dict[str, List[List[Any]]]:
+    """Returns a `Data` sheet of `rows` expenses with a date, a category and
+    `columns - 2` amounts, and a `Rate` sheet of daily exchange rates"""
+    data: List[List[Any]] = [
+        ["Date", "Category"] + [f"Amount {idx}" for idx in range(columns - 2)]
+    ]
+    for idx in range(rows):
+        data.append(
+            [FIRST_DATE + idx % 365, f"Category {idx % 12}"]
+            + [round(idx * 0.37 + col, 2) for col in range(columns - 2)]
+        )
+    rate: List[List[Any]] = [["Date", "EUR/BRL"]]
+    rate.extend([FIRST_DATE + idx, 5.5 + idx % 50 / 100] for idx in range(365))
+    return {"Data": data, "Rate": rate}
+
+
+class StubSheetsServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server answering like sheets.googleapis.com
+
+    Attributes:
+        sheets (Dict[str, List[List[Any]]]): Values of each sheet, the first
+            column holds dates.
+        latency (float): Seconds to wait before answering each request.
+        modified_time (str): Modification time of the spreadsheet returned
+            by Google Drive, to be changed along with the sheets.
+        requests (int): Number of served requests.
+        requests_by_method (Dict[str, int]): Number of served requests by
+            API method, ie. `values.batchGet` or `files.get`.
+        bytes (int): Number of bytes in served response bodies.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, sheets: Dict[str, List[List[Any]]], latency: float = 0.0, port: int = 0
+    ) -> None:
+        super().__init__(("127.0.0.1", port), StubSheetsHandler)
+        self.sheets = sheets
+        self.latency = latency
+        self.modified_time = "2023-01-01T00:00:00.000Z"
+        self.requests = 0
+        self.requests_by_method: Dict[str, int] = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def count_request(self, method: str, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.requests_by_method[method] = self.requests_by_method.get(method, 0) + 1
+            self.bytes += size
+
+    def resolve(self, range_name: str) -> Tuple[str, int, int, int, int]:
+        """Returns the sheet, first and last column and row of a range"""
+        if range_name in self.sheets:
+            values = self.sheets[range_name]
+            return range_name, 1, 1, max(len(row) for row in values), len(values)
+        match = RE_RANGE.match(range_name)
+        if not match:
+            raise ValueError(range_name)
+        return (
+            match["sheet"].strip("'"),
+            column_number(match["c1"]),
+            int(match["r1"]),
+            column_number(match["c2"]),
+            int(match["r2"]),
+        )
+
+    def window(self, range_name: str) -> Tuple[str, int, int, List[List[Any]]]:
+        sheet, c1, r1, c2, r2 = self.resolve(range_name)
+        rows = [row[c1 - 1 : c2] for row in self.sheets[sheet][r1 - 1 : r2]]
+        return sheet, c1, r1, rows
+
+    def grid_properties(self, sheet: str) -> Dict[str, int]:
+        values = self.sheets[sheet]
+        return {
+            "rowCount": max(len(values), GRID_ROWS),
+            "columnCount": max(
+                max((len(row) for row in values), default=0), GRID_COLUMNS
+            ),
+        }
+
+    @staticmethod
+    def cell(value: Any, is_date: bool, formatted: bool) -> Dict[str, Any]:
+        if value == "":
+            return {}
+        cell: Dict[str, Any] = {
+            "effectiveValue": {
+                "stringValue" if isinstance(value, str) else "numberValue": value
+            }
+        }
+        if formatted:
+            cell["formattedValue"] = str(value)
+        if is_date:
+            cell["effectiveFormat"] = {"numberFormat": {"type": "DATE"}}
+        return cell
+
+    def get_spreadsheet(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        include_grid_data = query.get("includeGridData") == ["true"]
+        fields = (query.get("fields") or [""])[0]
+        formatted = not fields or "formattedValue" in fields
+        grid_data: Dict[str, List[Dict[str, Any]]] = {}
+        for range_name in query.get("ranges", []) if include_grid_data else []:
+            sheet, c1, r1, rows = self.window(range_name)
+            grid_data.setdefault(sheet, []).append(
+                {
+                    "startRow": r1 - 1,
+                    "startColumn": c1 - 1,
+                    "rowData": [
+                        {
+                            "values": [
+                                self.cell(value, c1 + idx == 1, formatted)
+                                for idx, value in enumerate(row)
+                            ]
+                        }
+                        for row in rows
+                    ],
+                }
+            )
+        sheets = []
+        for sheet_id, title in enumerate(self.sheets):
+            sheet_info: Dict[str, Any] = {
+                "properties": {
+                    "sheetId": sheet_id,
+                    "title": title,
+                    "gridProperties": self.grid_properties(title),
+                }
+            }
+            if title in grid_data:
+                sheet_info["data"] = grid_data[title]
+            sheets.append(sheet_info)
+        return {"properties": {"title": "Benchmark"}, "sheets": sheets}
+
+    def value_range(self, range_name: str) -> Dict[str, Any]:
+        sheet, c1, r1, rows = self.window(range_name)
+        while rows and not any(value != "" for value in rows[-1]):
+            rows.pop()
+        width = max((len(row) for row in rows), default=1)
+        value_range: Dict[str, Any] = {
+            "range": f"{sheet}!{column_letter(c1)}{r1}:"
+            f"{column_letter(c1 + width - 1)}{r1 + max(len(rows), 1) - 1}"
+        }
+        if rows:
+            value_range["values"] = rows
+        return value_range
+
+    def batch_get(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        return {
+            "valueRanges": [
+                self.value_range(range_name) for range_name in query.get("ranges", [])
+            ]
+        }
+
+    def __enter__(self) -> "StubSheetsServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StubSheetsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubSheetsServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.server.latency)
+        if url.path.endswith("/values:batchGet"):
+            method, body = "values.batchGet", self.server.batch_get(query)
+        elif "/values/" in url.path:
+            method = "values.get"
+            body = self.server.value_range(unquote(url.path.rsplit("/", 1)[1]))
+        elif "/files/" in url.path:
+            method, body = "files.get", {"modifiedTime": self.server.modified_time}
+        else:
+            method, body = "spreadsheets.get", self.server.get_spreadsheet(query)
+        payload = json.dumps(body).encode()
+        self.server.count_request(method, len(payload))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
@@ -1,3 +1,7 @@
+locals {
+  timeout_seconds = 600
+}
+
 module "base_pipeline" {
   source = "../base_pipeline"
 
@@ -11,13 +15,16 @@ module "base_pipeline" {
   function_config = {
     max_instance_count = 1
     available_memory   = "512Mi"
-    timeout_seconds    = 600
+    timeout_seconds    = local.timeout_seconds
   }
 
   environment_variables = {
     SOURCES__GOOGLE_SHEETS__CREDENTIALS__CLIENT_EMAIL = var.data_bucket_writer_service_account_email
     SOURCES__GOOGLE_SHEETS__CREDENTIALS__PROJECT_ID   = var.project_id
     SOURCES__GOOGLE_SHEETS__SPREADSHEET_URL_OR_ID     = var.spreadsheet_url_or_id
+
+    # stop retrying throttled calls early enough to load the data before the timeout
+    SOURCES__GOOGLE_SHEETS__RETRY_TIME_BUDGET = local.timeout_seconds - 120
   }
 
   secrets = [
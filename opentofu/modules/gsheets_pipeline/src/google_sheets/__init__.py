@@ -1,24 +1,68 @@
 """Loads Google Sheets data from tabs, named and explicit ranges. Contains the main source functions."""
 
-from typing import Iterable, Sequence
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import logging
 
 import dlt
+from dlt.common.normalizers.naming import NamingConvention
+from dlt.common.schema.typing import TDataType, TTableSchemaColumns
+from dlt.common.typing import DictStrAny, TDataItem
 from dlt.sources import DltResource
 from dlt.sources.credentials import GcpServiceAccountCredentials
 
 from .helpers import api_calls
-from .helpers.api_calls import api_auth
+from .helpers.api_calls import api_auth, drive_auth
 from .helpers.data_processing import (
+    ParsedRange,
     get_data_types,
+    get_range_fingerprint,
     get_range_headers,
+    convert_range,
     get_spreadsheet_id,
+    index_grid_data,
+    infer_data_types,
     process_range,
+    process_range_arrow,
 )
+from .helpers.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# source state key holding the fingerprint of each loaded range
+FINGERPRINTS_KEY = "range_fingerprints"
+# source state key holding the modification time of the spreadsheet at the last load
+MODIFIED_TIME_KEY = "modified_time"
+# source state key holding the state of each spreadsheet of `google_spreadsheets`
+SPREADSHEETS_KEY = "spreadsheets"
+# read requests per minute per user allowed by the Google Sheets API quota
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# name, rows, fingerprint and column hints of a fetched range
+TFetchedRange = Tuple[
+    str, Iterator[TDataItem], Optional[str], Optional[TTableSchemaColumns]
+]
+# title and modification time of a fetched spreadsheet, and its ranges
+TFetchedSpreadsheet = Tuple[Optional[str], Optional[str], List[TFetchedRange]]
+
+# pools of worker processes converting ranges, by number of workers
+_conversion_pools: Dict[int, ProcessPoolExecutor] = {}
+# token buckets shared by the runs of warm instances, by requests per minute, so that cached API clients are reused
+_rate_limiters: Dict[int, TokenBucket] = {}
+
 
 @dlt.source
 def google_spreadsheet(
@@ -32,6 +76,18 @@ def google_spreadsheet(
     get_sheets: bool = False,
     get_named_ranges: bool = True,
     max_api_retries: int = 5,
+    retry_time_budget: Optional[float] = None,
+    skip_unchanged: bool = False,
+    check_modified_time: bool = False,
+    fetch_grid_data: bool = False,
+    data_format: str = "object",
+    infer_types: bool = False,
+    type_sample_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_concurrency: int = 4,
+    requests_per_minute: Optional[int] = None,
+    parallelized: bool = True,
+    conversion_workers: Optional[int] = None,
 ) -> Iterable[DltResource]:
     """
     The source for the dlt pipeline. It returns the following resources:
@@ -48,21 +104,236 @@ def google_spreadsheet(
             Defaults to False.
         get_named_ranges (bool, optional): If True, load all the named ranges inside the spreadsheet into the database.
             Defaults to True.
-        max_api_retries (int, optional): Max number of retires to google sheets API. Actual behavior is internal to google client.
+        max_api_retries (int, optional): Max number of retries of each call to the Google APIs failing with a transient
+            error, after a delay growing exponentially with jitter or the delay asked by the API. Defaults to 5.
+        retry_time_budget (Optional[float], optional): Seconds from the start of the run during which calls may be
+            retried, so that a throttled run fails within the timeout of the function instead of sleeping past it.
+            Defaults to None, no time budget.
+        skip_unchanged (bool, optional): If True, ranges whose values did not change since the last load are not yielded,
+            so their tables are kept as they are instead of being replaced. Defaults to False.
+        check_modified_time (bool, optional): If True, the modification time of the spreadsheet is read from Google Drive API
+            and nothing is loaded if it did not change since the last load. Requires Google Drive API to be enabled.
+            Note that formulas refreshed by Google (ie. GOOGLEFINANCE) do not change the modification time. Defaults to False.
+        fetch_grid_data (bool, optional): If True, values, headers and data types of all ranges are fetched with a single
+            request instead of three. Sheets and named ranges are still listed with a separate request when no
+            range_names are passed. Defaults to False.
+        data_format (str, optional): "arrow" to yield each range as a single Arrow table converted column by column,
+            "object" to yield a dictionary per row. Defaults to "object".
+        infer_types (bool, optional): If True, the data type of each column is inferred from the types of its values and
+            passed to dlt as column hints, instead of being inferred by dlt from the first row. Defaults to False.
+        type_sample_size (Optional[int], optional): Number of rows sampled to infer data types, None to sample all rows.
+            Defaults to None.
+        chunk_size (Optional[int], optional): If set, ranges are fetched in windows of `chunk_size` rows which are
+            converted as they arrive, so that memory is bounded by the window size instead of the range size. Headers, data
+            types and inferred types come from the first window, none are found if it holds only the headers. Not
+            supported with `skip_unchanged` and `fetch_grid_data`. Defaults to None.
+        max_concurrency (int, optional): Max number of windows fetched in parallel when `chunk_size` is set. Defaults to 4.
+        requests_per_minute (Optional[int], optional): Requests to the Google APIs allowed per minute. Defaults to None,
+            requests are not limited.
+        parallelized (bool, optional): If True, ranges are extracted concurrently, each one still loaded as its own
+            resource. The number of ranges extracted at once is bounded by the dlt `extract.workers` setting. Defaults
+            to True.
+        conversion_workers (Optional[int], optional): Number of worker processes converting the values of ranges into
+            rows or Arrow tables, so that concurrently extracted ranges are converted on several CPUs. Values and
+            converted rows are copied between processes, it pays off for large ranges on functions with several vCPUs.
+            Defaults to None, ranges are converted by the extracting threads.
+
+    Yields:
+        Iterable[DltResource]: List of dlt resources.
+    """
+    api_calls.retry_policy.reset(max_api_retries, retry_time_budget)
+    # state is only read here, it is written by the range resources once extracted
+    state = dlt.current.source_state()
+    _, modified_time, ranges = _fetch_ranges(
+        credentials,
+        get_spreadsheet_id(spreadsheet_url_or_id),
+        range_names,
+        state,
+        dlt.current.source_schema().naming,
+        rate_limiter=_rate_limiter(requests_per_minute),
+        conversion_pool=_conversion_pool(conversion_workers),
+        get_sheets=get_sheets,
+        get_named_ranges=get_named_ranges,
+        skip_unchanged=skip_unchanged,
+        check_modified_time=check_modified_time,
+        fetch_grid_data=fetch_grid_data,
+        data_format=data_format,
+        infer_types=infer_types,
+        type_sample_size=type_sample_size,
+        chunk_size=chunk_size,
+        max_concurrency=max_concurrency,
+    )
+    for name, rows, fingerprint, columns in ranges:
+        yield dlt.resource(
+            _store_fingerprint(rows, name, fingerprint, modified_time),
+            name=name,
+            write_disposition="replace",
+            columns=columns,
+            parallelized=parallelized,
+        )
+    if not ranges and modified_time not in (None, state.get(MODIFIED_TIME_KEY)):
+        # the spreadsheet changed outside of the loaded ranges, only its new modification time is stored
+        yield _modified_time_resource(MODIFIED_TIME_KEY, modified_time)
+
+
+@dlt.source
+def google_spreadsheets(
+    spreadsheets: List[DictStrAny] = dlt.config.value,
+    credentials: GcpServiceAccountCredentials = dlt.secrets.value,
+    get_sheets: bool = False,
+    get_named_ranges: bool = True,
+    max_api_retries: int = 5,
+    retry_time_budget: Optional[float] = None,
+    skip_unchanged: bool = False,
+    check_modified_time: bool = False,
+    fetch_grid_data: bool = False,
+    data_format: str = "object",
+    infer_types: bool = False,
+    type_sample_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    max_concurrency: int = 4,
+    max_parallel_spreadsheets: int = 4,
+    requests_per_minute: Optional[int] = DEFAULT_REQUESTS_PER_MINUTE,
+    parallelized: bool = True,
+    conversion_workers: Optional[int] = None,
+) -> Iterable[DltResource]:
+    """
+    The source for the dlt pipeline loading several spreadsheets. Spreadsheets are fetched concurrently, so that loading
+    all of them takes about as long as the slowest one, and their requests share the same rate limit to stay under the
+    quota of the Google Sheets API. Every range is loaded by a resource named after its spreadsheet and range, ie.
+    "Budget.Data".
+
+    Args:
+        spreadsheets (List[DictStrAny]): A list of dictionaries each containing the `id` (ID or URL) of a spreadsheet,
+            optionally the `range_names` to load, see `google_spreadsheet`, and the `use_name` prefixing its resources,
+            the title of the spreadsheet by default.
+        credentials (Union[GcpServiceAccountCredentials, GcpOAuthCredentials]): GCP credentials to the account
+            with Google Sheets API access, defined in dlt.secrets.
+        max_parallel_spreadsheets (int, optional): Max number of spreadsheets fetched in parallel. Defaults to 4.
+        requests_per_minute (Optional[int], optional): Requests to the Google APIs allowed per minute, shared by all
+            spreadsheets. The default matches the read quota per user of the Google Sheets API. None to not limit them.
+
+        See `google_spreadsheet` for the other arguments, applied to all spreadsheets. The retry time budget is shared
+        by all spreadsheets.
 
     Yields:
         Iterable[DltResource]: List of dlt resources.
     """
+    api_calls.retry_policy.reset(max_api_retries, retry_time_budget)
+    spreadsheets = [
+        {**spreadsheet, "id": get_spreadsheet_id(spreadsheet["id"])}
+        for spreadsheet in spreadsheets
+    ]
+    # the state of each spreadsheet is kept under its id
+    state: DictStrAny = dlt.current.source_state().get(SPREADSHEETS_KEY, {})
+    naming = dlt.current.source_schema().naming
+    rate_limiter = _rate_limiter(requests_per_minute)
+    conversion_pool = _conversion_pool(conversion_workers)
+
+    def fetch_spreadsheet(spreadsheet: DictStrAny) -> TFetchedSpreadsheet:
+        return _fetch_ranges(
+            credentials,
+            spreadsheet["id"],
+            spreadsheet.get("range_names"),
+            state.get(spreadsheet["id"], {}),
+            naming,
+            rate_limiter=rate_limiter,
+            conversion_pool=conversion_pool,
+            get_sheets=get_sheets,
+            get_named_ranges=get_named_ranges,
+            skip_unchanged=skip_unchanged,
+            check_modified_time=check_modified_time,
+            fetch_grid_data=fetch_grid_data,
+            data_format=data_format,
+            infer_types=infer_types,
+            type_sample_size=type_sample_size,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+
+    # resources are created here, worker threads only fetch the ranges
+    with ThreadPoolExecutor(
+        max_workers=max(min(max_parallel_spreadsheets, len(spreadsheets)), 1),
+        thread_name_prefix="google_spreadsheets",
+    ) as executor:
+        fetched = list(executor.map(fetch_spreadsheet, spreadsheets))
+    for spreadsheet, (title, modified_time, ranges) in zip(spreadsheets, fetched):
+        use_name = spreadsheet.get("use_name") or title or spreadsheet["id"]
+        for name, rows, fingerprint, columns in ranges:
+            yield dlt.resource(
+                _store_fingerprint(
+                    rows, name, fingerprint, modified_time, state_key=spreadsheet["id"]
+                ),
+                name=f"{use_name}.{name}",
+                write_disposition="replace",
+                columns=columns,
+                parallelized=parallelized,
+            )
+        stored_time = state.get(spreadsheet["id"], {}).get(MODIFIED_TIME_KEY)
+        if not ranges and modified_time not in (None, stored_time):
+            yield _modified_time_resource(
+                f"{use_name}.{MODIFIED_TIME_KEY}",
+                modified_time,
+                state_key=spreadsheet["id"],
+            )
+
+
+def _fetch_ranges(
+    credentials: GcpServiceAccountCredentials,
+    spreadsheet_id: str,
+    range_names: Optional[Sequence[str]],
+    state: DictStrAny,
+    naming: NamingConvention,
+    rate_limiter: Optional[TokenBucket],
+    conversion_pool: Optional[Executor],
+    get_sheets: bool,
+    get_named_ranges: bool,
+    skip_unchanged: bool,
+    check_modified_time: bool,
+    fetch_grid_data: bool,
+    data_format: str,
+    infer_types: bool,
+    type_sample_size: Optional[int],
+    chunk_size: Optional[int],
+    max_concurrency: int,
+) -> TFetchedSpreadsheet:
+    """
+    Fetches the ranges of a spreadsheet, see `google_spreadsheet` for the arguments. Does not use the dlt context, so
+    that spreadsheets can be fetched from other threads: `state` is the source state of the spreadsheet, read only, and
+    `naming` the naming convention of the source schema.
+
+    Returns:
+        TFetchedSpreadsheet: the title and modification time of the spreadsheet, if read, and the name, rows,
+            fingerprint and column hints of each range to load. Rows are converted, and fetched in chunked mode, once
+            iterated.
+    """
+    if chunk_size and (skip_unchanged or fetch_grid_data):
+        raise ValueError(
+            "chunk_size requires all values of a range to be fetched at once, it cannot be used with skip_unchanged or fetch_grid_data"
+        )
     # authenticate to the service using the helper function
-    service = api_auth(credentials, max_api_retries=max_api_retries)
-    # get spreadsheet id from url or id
-    spreadsheet_id = get_spreadsheet_id(spreadsheet_url_or_id)
+    service = api_auth(credentials, rate_limiter=rate_limiter)
+    modified_time: Optional[str] = None
+    if check_modified_time:
+        modified_time = api_calls.get_modified_time(
+            spreadsheet_id,
+            drive_auth(credentials, rate_limiter=rate_limiter),
+        )
+        if modified_time == state.get(MODIFIED_TIME_KEY):
+            logger.info(
+                f"Spreadsheet {spreadsheet_id} not modified since {modified_time}. Skipping."
+            )
+            return None, modified_time, []
+    fingerprints: DictStrAny = state.get(FINGERPRINTS_KEY, {})
     all_range_names = set(range_names or [])
+    spreadsheet_title = None
     # if no explicit ranges, get sheets and named ranges from metadata
     # get metadata with list of sheets and named ranges in the spreadsheet
-    sheet_names, named_ranges, spreadsheet_title = api_calls.get_known_range_names(
-        spreadsheet_id=spreadsheet_id, service=service
-    )
+    # grid data holds the spreadsheet title so explicit ranges do not need it
+    if not range_names or not fetch_grid_data:
+        sheet_names, named_ranges, spreadsheet_title = api_calls.get_known_range_names(
+            spreadsheet_id=spreadsheet_id, service=service
+        )
     if not range_names:
         if get_sheets:
             all_range_names.update(sheet_names)
@@ -70,11 +341,47 @@ def google_spreadsheet(
             all_range_names.update(named_ranges)
 
     # first we get all data for all the ranges (explicit or named)
-    all_range_data = api_calls.get_data_for_ranges(
-        service=service,
-        spreadsheet_id=spreadsheet_id,
-        range_names=list(all_range_names),
-    )
+    range_metadata: Dict[str, DictStrAny] = {}
+    # windows of rows fetched after the first one of each range, in chunked mode
+    range_windows: Dict[str, List[ParsedRange]] = {}
+    if chunk_size:
+        names = list(all_range_names)
+        first_windows = []
+        for name, bounds in zip(
+            names, api_calls.get_range_bounds(service, spreadsheet_id, names)
+        ):
+            windows = bounds.split_rows(chunk_size) if bounds else []
+            first_windows.append(str(windows[0]) if windows else name)
+            range_windows[name] = windows[1:]
+        # the first windows hold the headers and are fetched like whole ranges
+        all_range_data = [
+            (name, parsed_range, meta_range, values)
+            for name, (_, parsed_range, meta_range, values) in zip(
+                names,
+                api_calls.get_data_for_ranges(
+                    service=service,
+                    spreadsheet_id=spreadsheet_id,
+                    range_names=first_windows,
+                ),
+            )
+        ]
+    elif fetch_grid_data:
+        # grid data already holds the metadata of the first two rows
+        spreadsheet_title, grid_range_data = api_calls.get_grid_data_for_ranges(
+            service=service,
+            spreadsheet_id=spreadsheet_id,
+            range_names=list(all_range_names),
+        )
+        all_range_data = []
+        for name, parsed_range, metadata, values in grid_range_data:
+            range_metadata[name] = metadata
+            all_range_data.append((name, parsed_range, parsed_range, values))
+    else:
+        all_range_data = api_calls.get_data_for_ranges(
+            service=service,
+            spreadsheet_id=spreadsheet_id,
+            range_names=list(all_range_names),
+        )
     assert len(all_range_names) == len(all_range_data), (
         "Google Sheets API must return values for all requested ranges"
     )
@@ -102,7 +409,8 @@ def google_spreadsheet(
         if values is None or len(values) == 0:
             logger.warning(f"Range {name} does not contain any data. Skipping.")
             continue
-        if len(values) == 1:
+        # in chunked mode the data may start in the next windows, which are only read once the range is loaded
+        if len(values) == 1 and not range_windows.get(name):
             logger.warning(f"Range {name} contain only 1 row of data. Skipping.")
             continue
         if len(values[0]) == 0:
@@ -110,25 +418,35 @@ def google_spreadsheet(
                 f"First row of range {name} does not contain data. Skipping."
             )
             continue
+        fingerprint = None
+        if skip_unchanged:
+            fingerprint = get_range_fingerprint(parsed_range, values)
+            if fingerprint == fingerprints.get(name):
+                logger.info(f"Range {name} did not change since last load. Skipping.")
+                continue
         metadata_table[-1]["skipped"] = False
-        range_data.append((name, parsed_range, meta_range, values))
+        range_data.append((name, parsed_range, meta_range, values, fingerprint))
 
-    meta_values = api_calls.get_meta_for_ranges(
-        service, spreadsheet_id, [str(data[2]) for data in range_data]
-    )
-    for name, parsed_range, _, values in range_data:
-        logger.info(f"Processing range {parsed_range} with name {name}")
+    if not range_data:
+        # requesting metadata without ranges would return the whole spreadsheet
+        return spreadsheet_title, modified_time, []
+    if not fetch_grid_data:
+        meta_values = api_calls.get_meta_for_ranges(
+            service, spreadsheet_id, [str(data[2]) for data in range_data]
+        )
         # here is a tricky part due to how Google Sheets API returns the metadata. We are not able to directly pair the input range names with returned metadata objects
         # instead metadata objects are grouped by sheet names, still each group order preserves the order of input ranges
-        # so for each range we get a sheet name, we look for the metadata group for that sheet and then we consume first object on that list with pop
-        metadata = next(
-            sheet
-            for sheet in meta_values["sheets"]
-            if sheet["properties"]["title"] == parsed_range.sheet_name
-        )["data"].pop(0)
+        # so the groups are indexed by sheet name once and each range consumes the first object left in the group of its sheet
+        sheet_metadata = index_grid_data(meta_values["sheets"])
+        for name, parsed_range, _, _, _ in range_data:
+            range_metadata[name] = sheet_metadata[parsed_range.sheet_name].popleft()
+    ranges: List[TFetchedRange] = []
+    for name, parsed_range, _, values, fingerprint in range_data:
+        logger.info(f"Processing range {parsed_range} with name {name}")
+        metadata = range_metadata[name]
 
         headers_metadata = metadata["rowData"][0]["values"]
-        headers = get_range_headers(headers_metadata, name)
+        headers = get_range_headers(headers_metadata, name, naming)
         if headers is None:
             # generate automatic headers and treat the first row as data
             headers = [f"col_{idx + 1}" for idx in range(len(headers_metadata))]
@@ -138,20 +456,158 @@ def google_spreadsheet(
                 f"Using automatic headers. WARNING: first row of the range {name} will be used as data!"
             )
         else:
-            # first row contains headers and is skipped
-            data_row_metadata = metadata["rowData"][1]["values"]
+            # first row contains headers and is skipped, a first window holding only headers has no data row metadata
+            row_data = metadata["rowData"]
+            data_row_metadata = (
+                row_data[1].get("values") if len(row_data) > 1 else None
+            ) or [{} for _ in headers_metadata]
             rows_data = values[1:]
 
         data_types = get_data_types(data_row_metadata)
+        columns: Optional[TTableSchemaColumns] = None
+        if infer_types:
+            data_types = infer_data_types(
+                rows_data, headers, data_types, sample_size=type_sample_size
+            )
+            columns = {
+                naming.normalize_identifier(header): {
+                    "name": naming.normalize_identifier(header),
+                    "data_type": data_type,
+                }
+                for header, data_type in zip(headers, data_types)
+                if data_type
+            }
 
-        yield dlt.resource(
-            process_range(rows_data, headers=headers, data_types=data_types),
-            name=name,
-            write_disposition="replace",
-        )
+        process = process_range_arrow if data_format == "arrow" else process_range
+        rows = _convert(process, rows_data, headers, data_types, conversion_pool)
+        if range_windows.get(name):
+            # next windows start at the first column left after trimming the first one
+            windows = [
+                window._replace(start_col=parsed_range.start_col)
+                for window in range_windows[name]
+            ]
+            windows_values = api_calls.get_windows_values(
+                lambda: api_auth(credentials, rate_limiter=rate_limiter),
+                spreadsheet_id,
+                windows,
+                max_concurrency,
+            )
+            rows = _warn_if_empty(
+                chain(
+                    rows,
+                    _process_windows(
+                        process, windows_values, headers, data_types, conversion_pool
+                    ),
+                ),
+                name,
+            )
+        ranges.append((name, rows, fingerprint, columns))
     # yield dlt.resource(
     #     metadata_table,
     #     write_disposition="merge",
     #     name="spreadsheet_info",
     #     merge_key="spreadsheet_id",
     # )
+
+    return spreadsheet_title, modified_time, ranges
+
+
+def _convert(
+    process: Callable[..., Iterator[TDataItem]],
+    sheet_values: List[List[Any]],
+    headers: List[str],
+    data_types: List[Optional[TDataType]],
+    conversion_pool: Optional[Executor],
+) -> Iterator[TDataItem]:
+    """Converts the values of a range with `process` once iterated, in a worker process of `conversion_pool` if passed"""
+    if conversion_pool is None:
+        items = convert_range(process, sheet_values, headers, data_types)
+    else:
+        items = conversion_pool.submit(
+            convert_range, process, sheet_values, headers, data_types
+        ).result()
+    # rows are yielded as a single list, parallelized resources are advanced one item at a time by the worker threads
+    if items and isinstance(items[0], dict):
+        yield items
+    else:
+        yield from items
+
+
+def _conversion_pool(conversion_workers: Optional[int]) -> Optional[Executor]:
+    """Returns a pool of `conversion_workers` processes, kept for the next runs like the API clients"""
+    if not conversion_workers:
+        return None
+    if conversion_workers not in _conversion_pools:
+        # workers are spawned, forking a process running extraction threads is not safe
+        _conversion_pools[conversion_workers] = ProcessPoolExecutor(
+            conversion_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _conversion_pools[conversion_workers]
+
+
+def _process_windows(
+    process: Callable[..., Iterator[TDataItem]],
+    windows_values: Iterator[List[List[Any]]],
+    headers: List[str],
+    data_types: List[Optional[TDataType]],
+    conversion_pool: Optional[Executor],
+) -> Iterator[TDataItem]:
+    """Processes the values of the next windows of a range with the headers and data types of its first window"""
+    for window_values in windows_values:
+        yield from _convert(
+            process, window_values, headers, data_types, conversion_pool
+        )
+
+
+def _warn_if_empty(items: Iterator[TDataItem], range_name: str) -> Iterator[TDataItem]:
+    """Yields the items of a range fetched in windows and warns if all windows were read without data, like ranges
+    holding only headers are skipped when fetched at once"""
+    empty = True
+    for item in items:
+        empty = False
+        yield item
+    if empty:
+        logger.warning(f"Range {range_name} contain only 1 row of data. Skipping.")
+
+
+def _rate_limiter(requests_per_minute: Optional[int]) -> Optional[TokenBucket]:
+    """Returns a token bucket allowing `requests_per_minute`, with bursts of up to a minute of requests, kept for the
+    next runs like the API clients built with it"""
+    if not requests_per_minute:
+        return None
+    if requests_per_minute not in _rate_limiters:
+        _rate_limiters[requests_per_minute] = TokenBucket(
+            requests_per_minute / 60, capacity=requests_per_minute
+        )
+    return _rate_limiters[requests_per_minute]
+
+
+def _modified_time_resource(
+    name: str, modified_time: str, state_key: Optional[str] = None
+) -> DltResource:
+    """Returns a resource yielding no rows which writes the modification time of a spreadsheet to the source state, so
+    that a spreadsheet modified outside of its loaded ranges is skipped by the next runs."""
+    return dlt.resource(
+        _store_fingerprint(iter(()), name, None, modified_time, state_key=state_key),
+        name=name,
+    )
+
+
+def _store_fingerprint(
+    rows: Iterator[TDataItem],
+    range_name: str,
+    fingerprint: Optional[str],
+    modified_time: Optional[str],
+    state_key: Optional[str] = None,
+) -> Iterator[TDataItem]:
+    """Yields the rows of a range, then writes its fingerprint and the spreadsheet modification time to the source state,
+    or to the state of the spreadsheet under `state_key`. State can only be written during extraction so this runs
+    inside of the resource."""
+    yield from rows
+    state = dlt.current.source_state()
+    if state_key is not None:
+        state = state.setdefault(SPREADSHEETS_KEY, {}).setdefault(state_key, {})
+    if fingerprint is not None:
+        state.setdefault(FINGERPRINTS_KEY, {})[range_name] = fingerprint
+    if modified_time is not None:
+        state[MODIFIED_TIME_KEY] = modified_time
@@ -1,71 +1,215 @@
 """Contains helper functions to extract data from spreadsheet API"""
 
-from typing import Any, List, Tuple, Optional
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Tuple, Optional
 
 from dlt.common.exceptions import MissingDependencyException
 from dlt.common.typing import DictStrAny
 from dlt.sources.credentials import GcpCredentials, GcpOAuthCredentials
-from dlt.sources.helpers.requests.retry import DEFAULT_RETRY_STATUS
-from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-from .data_processing import ParsedRange, trim_range_top_left
+from .data_processing import (
+    ParsedRange,
+    add_formatted_values,
+    column_letter,
+    get_grid_values,
+    get_range_sheet_name,
+    index_grid_data,
+    trim_range_top_left,
+)
+from .rate_limiter import TokenBucket
+from .retry_policy import RetryPolicy
 
-try:
-    from apiclient.discovery import build
-except ImportError:
-    raise MissingDependencyException("Google API Client", ["google-api-python-client"])
+# field masks make Google return only the fields used by the source
+KNOWN_RANGE_NAMES_FIELDS = "properties.title,sheets.properties.title,namedRanges.name"
+META_FIELDS = "sheets(properties.title,data.rowData.values(effectiveValue,formattedValue,effectiveFormat.numberFormat.type))"
+VALUES_FIELDS = "valueRanges(range,values)"
+RANGE_BOUNDS_FIELDS = (
+    "sheets.properties(sheetId,title,gridProperties(rowCount,columnCount)),"
+    "namedRanges(name,range)"
+)
+GRID_DATA_FIELDS = (
+    "properties.title,namedRanges(name,range.sheetId),sheets(properties(sheetId,title),"
+    "data(startRow,startColumn,rowData.values(effectiveValue,effectiveFormat.numberFormat.type)))"
+)
 
 
-def is_retry_status_code(exception: BaseException) -> bool:
-    """Retry condition on HttpError"""
-    from googleapiclient.errors import HttpError  # type: ignore
+# retries all calls to the Google APIs, reset by the sources at the start of each run
+retry_policy = RetryPolicy()
 
-    # print(f"RETRY ON {str(HttpError)} = {isinstance(exception, HttpError) and exception.resp.status in DEFAULT_RETRY_STATUS}")
-    # if isinstance(exception, HttpError):
-    #     print(exception.resp.status)
-    #     print(DEFAULT_RETRY_STATUS)
-    return (
-        isinstance(exception, HttpError)
-        and exception.resp.status in DEFAULT_RETRY_STATUS
-    )
 
+# native credentials are kept by warm instances of the function, google-auth refreshes their token once expired
+_native_credentials: Dict[str, Any] = {}
+_native_credentials_lock = threading.Lock()
+# services are kept as well but per thread, since httplib2 is not thread safe, the least recently used ones are
+# dropped beyond this number
+MAX_SERVICES_PER_THREAD = 8
+_services = threading.local()
+
+
+def get_native_credentials(credentials: GcpCredentials, scope: str) -> Any:
+    """
+    Returns the native credentials of `credentials`, cached so that a valid access token is reused by the next calls
+    instead of being requested again. OAuth credentials only get an access token the first time.
+
+    Args:
+        credentials (GcpCredentials): Credentials needed to log in to GCP.
+        scope (str): The scope of the credentials.
+
+    Returns:
+        Any: google-auth credentials.
+    """
+    key = hashlib.sha256(
+        f"{scope}:{credentials.to_native_representation()}".encode()
+    ).hexdigest()
+    with _native_credentials_lock:
+        if key not in _native_credentials:
+            if isinstance(credentials, GcpOAuthCredentials):
+                credentials.auth(scope)
+            native_credentials = credentials.to_native_credentials()
+            # scope service account credentials here, the client would scope a copy for each service
+            if getattr(native_credentials, "requires_scopes", False):
+                native_credentials = native_credentials.with_scopes([scope])
+            _native_credentials[key] = native_credentials
+        return _native_credentials[key]
 
-retry_deco = retry(
-    # Retry if it's a rate limit error (HTTP 429)
-    retry=retry_if_exception(is_retry_status_code),
-    # Use exponential backoff for the waiting time between retries, starting with 5 seconds
-    wait=wait_exponential(multiplier=1.5, min=5, max=120),
-    # Stop retrying after 10 attempts
-    stop=stop_after_attempt(10),
-    # Print out the retrying details
-    reraise=True,
-)
 
+def build_service(
+    service_name: str,
+    version: str,
+    credentials: GcpCredentials,
+    scope: str,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> Any:
+    """
+    Builds a Google API service or returns the one already built by the current thread with the same credentials and
+    rate limiter, which must outlive the service like the token buckets of the sources.
+    The discovery document is read from the documents bundled with the client instead of being downloaded, and the
+    client is only imported on first use as the import is slow.
+
+    Args:
+        service_name (str): The name of the API, ie. "sheets".
+        version (str): The version of the API, ie. "v4".
+        credentials (GcpCredentials): Credentials needed to log in to GCP.
+        scope (str): The scope of the credentials.
+        rate_limiter (Optional[TokenBucket], optional): Takes a token before each request, shared by the services
+            that must stay under the same quota. Defaults to None.
 
-def api_auth(credentials: GcpCredentials, max_api_retries: int) -> Any:
+    Returns:
+        Any: Object needed to make API calls to the API.
+    """
+    native_credentials = get_native_credentials(credentials, scope)
+    if not hasattr(_services, "services"):
+        _services.services = OrderedDict()
+    services: OrderedDict[Tuple[str, str, int, int], Any] = _services.services
+    key = (service_name, version, id(native_credentials), id(rate_limiter))
+    if key in services:
+        services.move_to_end(key)
+    else:
+        try:
+            from apiclient.discovery import build
+            from apiclient.http import HttpRequest
+        except ImportError:
+            raise MissingDependencyException(
+                "Google API Client", ["google-api-python-client"]
+            )
+
+        services[key] = build(
+            service_name,
+            version,
+            credentials=native_credentials,
+            static_discovery=True,
+            requestBuilder=rate_limited_request(HttpRequest, rate_limiter)
+            if rate_limiter
+            else HttpRequest,
+        )
+        if len(services) > MAX_SERVICES_PER_THREAD:
+            services.popitem(last=False)
+    return services[key]
+
+
+def rate_limited_request(request_class: Any, rate_limiter: TokenBucket) -> Any:
+    """Returns a subclass of the Google API client request taking a token of `rate_limiter` before being executed"""
+
+    class RateLimitedHttpRequest(request_class):  # type: ignore[misc,valid-type]
+        def execute(self, http: Any = None, num_retries: int = 0) -> Any:
+            rate_limiter.acquire()
+            return super().execute(http=http, num_retries=num_retries)
+
+    return RateLimitedHttpRequest
+
+
+def api_auth(
+    credentials: GcpCredentials,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> Any:
     """
     Uses GCP credentials to authenticate with Google Sheets API.
 
     Args:
         credentials (GcpCredentials): Credentials needed to log in to GCP.
-        max_api_retries (int): Max number of retires to google sheets API. Actual behavior is internal to google client.
+        rate_limiter (Optional[TokenBucket], optional): Takes a token before each request. Defaults to None.
 
     Returns:
         Any: Object needed to make API calls to Google Sheets API.
     """
-    if isinstance(credentials, GcpOAuthCredentials):
-        credentials.auth("https://www.googleapis.com/auth/spreadsheets.readonly")
-    # Build the service object for Google sheets api.
-    service = build(
+    # Build the service object for Google sheets api, reused by the next calls of the thread.
+    return build_service(
         "sheets",
         "v4",
-        credentials=credentials.to_native_credentials(),
-        num_retries=max_api_retries,
+        credentials,
+        "https://www.googleapis.com/auth/spreadsheets.readonly",
+        rate_limiter,
     )
-    return service
 
 
-@retry_deco
+def drive_auth(
+    credentials: GcpCredentials,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> Any:
+    """
+    Uses GCP credentials to authenticate with Google Drive API, used to read file metadata only.
+
+    Args:
+        credentials (GcpCredentials): Credentials needed to log in to GCP.
+        rate_limiter (Optional[TokenBucket], optional): Takes a token before each request. Defaults to None.
+
+    Returns:
+        Any: Object needed to make API calls to Google Drive API.
+    """
+    return build_service(
+        "drive",
+        "v3",
+        credentials,
+        "https://www.googleapis.com/auth/drive.metadata.readonly",
+        rate_limiter,
+    )
+
+
+@retry_policy
+def get_modified_time(spreadsheet_id: str, service: Any) -> str:
+    """
+    Retrieves the time the spreadsheet was last modified. Much cheaper than reading the spreadsheet metadata or values.
+
+    Args:
+        spreadsheet_id (str): The ID of the spreadsheet.
+        service (Any): Resource object used to make API calls to Google Drive API.
+
+    Returns:
+        str: Last modification time of the spreadsheet file in RFC 3339 format
+    """
+    metadata = (
+        service.files()
+        .get(fileId=spreadsheet_id, fields="modifiedTime", supportsAllDrives=True)
+        .execute()
+    )
+    modified_time: str = metadata["modifiedTime"]
+    return modified_time
+
+
+@retry_policy
 def get_meta_for_ranges(
     service: Any, spreadsheet_id: str, range_names: List[str]
 ) -> Any:
@@ -76,12 +220,13 @@ def get_meta_for_ranges(
             spreadsheetId=spreadsheet_id,
             ranges=range_names,
             includeGridData=True,
+            fields=META_FIELDS,
         )
         .execute()
     )
 
 
-@retry_deco
+@retry_policy
 def get_known_range_names(
     spreadsheet_id: str, service: Any
 ) -> Tuple[List[str], List[str], str]:
@@ -95,14 +240,18 @@ def get_known_range_names(
     Returns:
         Tuple[List[str], List[str], str] sheet names, named ranges, spreadheet title
     """
-    metadata = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+    metadata = (
+        service.spreadsheets()
+        .get(spreadsheetId=spreadsheet_id, fields=KNOWN_RANGE_NAMES_FIELDS)
+        .execute()
+    )
     sheet_names: List[str] = [s["properties"]["title"] for s in metadata["sheets"]]
     named_ranges: List[str] = [r["name"] for r in metadata.get("namedRanges", {})]
     title: str = metadata["properties"]["title"]
     return sheet_names, named_ranges, title
 
 
-@retry_deco
+@retry_policy
 def get_data_for_ranges(
     service: Any, spreadsheet_id: str, range_names: List[str]
 ) -> List[Tuple[str, ParsedRange, ParsedRange, Optional[List[List[Any]]]]]:
@@ -127,6 +276,7 @@ def get_data_for_ranges(
             valueRenderOption="UNFORMATTED_VALUE",
             # will return formatted dates as a serial number
             dateTimeRenderOption="SERIAL_NUMBER",
+            fields=VALUES_FIELDS,
         )
         .execute()
     )
@@ -144,3 +294,208 @@ def get_data_for_ranges(
         # print(f"{name}:{parsed_range}:{meta_range}")
         rv.append((name, parsed_range, meta_range, values))
     return rv
+
+
+@retry_policy
+def get_grid_data_for_ranges(
+    service: Any, spreadsheet_id: str, range_names: List[str]
+) -> Tuple[str, List[Tuple[str, ParsedRange, DictStrAny, Optional[List[List[Any]]]]]]:
+    """
+    Calls Google Sheets API to get values and metadata of all ranges in a single request, instead of requesting the
+    values and then the metadata of the first two rows. Grid data holds the format of every cell, so the field mask
+    limits it to the effective value and number format type.
+
+    Args:
+        service (Any): Object to make API calls to Google Sheets.
+        spreadsheet_id (str): The ID of the spreadsheet.
+        range_names (List[str]): List of range names.
+
+    Returns:
+        Tuple[str, List[...]]: spreadsheet title and, in the same order as `range_names`, the name, location, metadata
+            of the first two rows and values of each range
+    """
+    spreadsheet = (
+        service.spreadsheets()
+        .get(
+            spreadsheetId=spreadsheet_id,
+            ranges=range_names,
+            includeGridData=True,
+            fields=GRID_DATA_FIELDS,
+        )
+        .execute()
+    )
+    # sheet id 0 is omitted from the response
+    sheet_titles = {
+        sheet["properties"].get("sheetId", 0): sheet["properties"]["title"]
+        for sheet in spreadsheet["sheets"]
+    }
+    named_ranges = {
+        named_range["name"]: sheet_titles[named_range["range"].get("sheetId", 0)]
+        for named_range in spreadsheet.get("namedRanges", [])
+    }
+    # grid data is grouped by sheet, in the order of the requested ranges
+    sheet_data = index_grid_data(spreadsheet["sheets"])
+    rv = []
+    for name in range_names:
+        sheet_name = get_range_sheet_name(name, sheet_data, named_ranges)
+        grid_data = sheet_data[sheet_name].popleft()
+        row_data: List[DictStrAny] = grid_data.get("rowData", [])
+        values: Optional[List[List[Any]]] = get_grid_values(row_data)
+        start_row = grid_data.get("startRow", 0) + 1
+        start_col = grid_data.get("startColumn", 0)
+        width = max((len(row) for row in values), default=1)
+        parsed_range = ParsedRange(
+            sheet_name,
+            column_letter(start_col),
+            start_row,
+            column_letter(start_col + max(width - 1, 0)),
+            start_row + max(len(values) - 1, 0),
+        )
+        metadata: DictStrAny = {"rowData": []}
+        if values:
+            # locate the first non empty row and column like `trim_range_top_left`
+            shift_x = next(idx for idx, row in enumerate(values) if row)
+            shift_y = next(idx for idx, val in enumerate(values[shift_x]) if val != "")
+            parsed_range, values = trim_range_top_left(parsed_range, values)
+            header_cells = row_data[shift_x]["values"]
+            # the values API drops empty cells at the end of the header row as well
+            end_y = len(header_cells)
+            while end_y > shift_y and "effectiveValue" not in header_cells[end_y - 1]:
+                end_y -= 1
+            header_cells = header_cells[shift_y:end_y]
+            # formatted values are not requested, headers only need the strings
+            metadata["rowData"] = [{"values": add_formatted_values(header_cells)}]
+            if shift_x + 1 < len(row_data):
+                data_cells = row_data[shift_x + 1].get("values", [])[shift_y:]
+                metadata["rowData"].append({"values": add_formatted_values(data_cells)})
+        else:
+            values = None
+        rv.append((name, parsed_range, metadata, values))
+    return spreadsheet["properties"]["title"], rv
+
+
+@retry_policy
+def get_range_bounds(
+    service: Any, spreadsheet_id: str, range_names: List[str]
+) -> List[Optional[ParsedRange]]:
+    """
+    Retrieves the grid size of sheets and the location of named ranges to find the rows and columns covered by each range
+
+    Args:
+        service (Any): Object to make API calls to Google Sheets.
+        spreadsheet_id (str): The ID of the spreadsheet.
+        range_names (List[str]): List of range names.
+
+    Returns:
+        List[Optional[ParsedRange]]: The bounds of each range in the same order as `range_names`, None if not known
+    """
+    metadata = (
+        service.spreadsheets()
+        .get(spreadsheetId=spreadsheet_id, fields=RANGE_BOUNDS_FIELDS)
+        .execute()
+    )
+    # sheet id 0 and zero indexes are omitted from the response
+    sheets = {
+        sheet["properties"].get("sheetId", 0): sheet["properties"]
+        for sheet in metadata["sheets"]
+    }
+    named_ranges = {
+        named_range["name"]: named_range["range"]
+        for named_range in metadata.get("namedRanges", [])
+    }
+    sheet_bounds = {
+        sheet["title"]: ParsedRange(
+            sheet["title"],
+            "A",
+            1,
+            column_letter(sheet["gridProperties"]["columnCount"] - 1),
+            sheet["gridProperties"]["rowCount"],
+        )
+        for sheet in sheets.values()
+    }
+    bounds: List[Optional[ParsedRange]] = []
+    for name in range_names:
+        if name in sheet_bounds:
+            bounds.append(sheet_bounds[name])
+        elif name in named_ranges:
+            grid_range = named_ranges[name]
+            sheet = sheets[grid_range.get("sheetId", 0)]
+            grid = sheet["gridProperties"]
+            bounds.append(
+                ParsedRange(
+                    sheet["title"],
+                    column_letter(grid_range.get("startColumnIndex", 0)),
+                    grid_range.get("startRowIndex", 0) + 1,
+                    column_letter(
+                        grid_range.get("endColumnIndex", grid["columnCount"]) - 1
+                    ),
+                    grid_range.get("endRowIndex", grid["rowCount"]),
+                )
+            )
+        else:
+            try:
+                bounds.append(ParsedRange.parse_range(name))
+            except ValueError:
+                # ie. whole columns, fetched in a single window
+                bounds.append(None)
+    return bounds
+
+
+@retry_policy
+def get_window_values(
+    service: Any, spreadsheet_id: str, window: ParsedRange
+) -> List[List[Any]]:
+    """Retrieves the values of a window of rows of a range"""
+    value_range = (
+        service.spreadsheets()
+        .values()
+        .get(
+            spreadsheetId=spreadsheet_id,
+            range=str(window),
+            valueRenderOption="UNFORMATTED_VALUE",
+            dateTimeRenderOption="SERIAL_NUMBER",
+            fields="values",
+        )
+        .execute()
+    )
+    values: List[List[Any]] = value_range.get("values", [])
+    return values
+
+
+def get_windows_values(
+    service_factory: Callable[[], Any],
+    spreadsheet_id: str,
+    windows: List[ParsedRange],
+    max_concurrency: int,
+) -> Iterator[List[List[Any]]]:
+    """
+    Fetches windows of rows with at most `max_concurrency` requests in flight and yields their values in order, so
+    that at most `max_concurrency` windows are held in memory on top of the one being processed.
+
+    Args:
+        service_factory (Callable[[], Any]): Builds an object to make API calls to Google Sheets. Each worker thread builds
+            its own as http connections of the Google API client are not thread safe.
+        spreadsheet_id (str): The ID of the spreadsheet.
+        windows (List[ParsedRange]): The windows to fetch.
+        max_concurrency (int): The maximum number of requests in flight.
+
+    Yields:
+        List[List[Any]]: The values of each window, in the order of `windows`
+    """
+    local = threading.local()
+
+    def fetch(window: ParsedRange) -> List[List[Any]]:
+        if not hasattr(local, "service"):
+            local.service = service_factory()
+        return get_window_values(local.service, spreadsheet_id, window)
+
+    with ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix="gsheets_windows"
+    ) as executor:
+        pending: Deque[Future[List[List[Any]]]] = deque()
+        for window in windows:
+            pending.append(executor.submit(fetch, window))
+            if len(pending) >= max_concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,13 +1,31 @@
 """This is a helper module that contains function which validate and process data"""
 
+import hashlib
+import json
 import logging
 import re
-from typing import Any, Iterator, List, Tuple, Union, NamedTuple, Optional
+from collections import deque
+from functools import lru_cache
+from itertools import zip_longest
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Tuple,
+    Union,
+    NamedTuple,
+    Optional,
+    Set,
+)
 
 import dlt
 from dlt.common import pendulum
+from dlt.common.normalizers.naming import NamingConvention
 from dlt.common.typing import DictStrAny
-from dlt.common.data_types import TDataType
+from dlt.common.data_types import TDataType, coerce_value, py_type_to_sc_type
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +37,18 @@ SECONDS_PER_DAY = 86400
 DLT_TIMEZONE = "UTC"
 # number of seconds from UNIX timestamp origin (1st Jan 1970) to serial number origin (30th Dec 1899)
 TIMESTAMP_CONST = -2209161600.0
+# formatted values of cells with errors, as returned for unformatted values
+ERROR_VALUES = {
+    "ERROR": "#ERROR!",
+    "NULL_VALUE": "#NULL!",
+    "DIVIDE_BY_ZERO": "#DIV/0!",
+    "VALUE": "#VALUE!",
+    "REF": "#REF!",
+    "NAME": "#NAME?",
+    "NUM": "#NUM!",
+    "N_A": "#N/A",
+    "LOADING": "Loading...",
+}
 # compiled regex to extract ranges
 RE_PARSE_RANGE = re.compile(
     r"^(?:(?P<sheet>[\'\w\s]+)!)?(?P<start_col>[A-Z]+)(?P<start_row>\d+):(?P<end_col>[A-Z]+)(?P<end_row>\d+)$"
@@ -33,6 +63,8 @@ class ParsedRange(NamedTuple):
     end_row: int
 
     @classmethod
+    # the same ranges are parsed for every request, parsed ranges are immutable
+    @lru_cache(maxsize=1024)
     def parse_range(cls, s: str) -> "ParsedRange":
         match = RE_PARSE_RANGE.match(s)
         if match:
@@ -50,6 +82,32 @@ class ParsedRange(NamedTuple):
     def __str__(self) -> str:
         return f"{self.sheet_name}!{self.start_col}{self.start_row}:{self.end_col}{self.end_row}"
 
+    @property
+    def start_col_index(self) -> int:
+        return column_index(self.start_col)
+
+    @property
+    def end_col_index(self) -> int:
+        return column_index(self.end_col)
+
+    def split_rows(self, chunk_size: int) -> List["ParsedRange"]:
+        """
+        Splits the range into windows of `chunk_size` rows, in order.
+
+        Parameters:
+        chunk_size (int): The maximum number of rows of a window.
+
+        Returns:
+        List[ParsedRange]: Ranges of the same columns covering all rows of the range.
+        """
+        return [
+            self._replace(
+                start_row=start_row,
+                end_row=min(start_row + chunk_size - 1, self.end_row),
+            )
+            for start_row in range(self.start_row, self.end_row + 1, chunk_size)
+        ]
+
     @staticmethod
     def shift_column(col: str, shift: int) -> str:
         """
@@ -62,21 +120,44 @@ class ParsedRange(NamedTuple):
         Returns:
         str: The new column string after shifting.
         """
-        # Convert column string to column index (1-indexed)
-        col_num = 0
-        for i, char in enumerate(reversed(col)):
-            col_num += (ord(char.upper()) - 65 + 1) * (26**i)
+        return column_letter(column_index(col) + shift)
 
-        # Shift the column index
-        col_num += shift
 
-        # Convert back to column string
-        col_str = ""
-        while col_num > 0:
-            col_num, remainder = divmod(col_num - 1, 26)
-            col_str = chr(65 + remainder) + col_str
+@lru_cache(maxsize=None)
+def column_index(col: str) -> int:
+    """
+    Converts a column in A1 notation to its zero based index, ie. "A" to 0 and "AA" to 26. Conversions are cached, a
+    spreadsheet has at most 18278 columns.
 
-        return col_str
+    Args:
+        col (str): The column letters.
+
+    Returns:
+        int: The index of the column.
+    """
+    index = 0
+    for char in col.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+@lru_cache(maxsize=None)
+def column_letter(index: int) -> str:
+    """
+    Converts a zero based column index to A1 notation, ie. 0 to "A" and 26 to "AA". Conversions are cached.
+
+    Args:
+        index (int): The index of the column.
+
+    Returns:
+        str: The column letters.
+    """
+    col = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        col = chr(65 + remainder) + col
+    return col
 
 
 def get_spreadsheet_id(url_or_id: str) -> str:
@@ -128,13 +209,118 @@ def extract_spreadsheet_id_from_url(url: str) -> str:
     raise ValueError(f"Invalid URL. Cannot find spreadsheet ID in url: {url}")
 
 
-def get_range_headers(headers_metadata: List[DictStrAny], range_name: str) -> List[str]:
+def get_range_sheet_name(
+    range_name: str, sheets: Dict[str, Any], named_ranges: Dict[str, str]
+) -> str:
+    """
+    Finds the sheet of a range passed to the API: a sheet name, a named range or a range in A1 notation.
+
+    Args:
+        range_name (str): The name of the range.
+        sheets (Dict[str, Any]): The sheets of the spreadsheet keyed by name, in order.
+        named_ranges (Dict[str, str]): Name of the sheet of each named range.
+
+    Returns:
+        str: The name of the sheet holding the range.
+    """
+    if range_name in sheets:
+        return range_name
+    if range_name in named_ranges:
+        return named_ranges[range_name]
+    if "!" in range_name:
+        return range_name.rsplit("!", 1)[0].strip("'")
+    # ranges without sheet name refer to the first sheet
+    return next(iter(sheets))
+
+
+def index_grid_data(sheets: List[DictStrAny]) -> Dict[str, Deque[DictStrAny]]:
+    """
+    Indexes the grid data of the sheets of a spreadsheet by sheet name. Grid data objects do not tell which requested
+    range they belong to: they are grouped by sheet, in the order of the requested ranges, so each range takes the first
+    object left in the queue of its sheet.
+
+    Args:
+        sheets (List[DictStrAny]): The sheets of a spreadsheet fetched with grid data.
+
+    Returns:
+        Dict[str, Deque[DictStrAny]]: The grid data objects of each sheet, in the order of the requested ranges.
+    """
+    return {
+        sheet["properties"]["title"]: deque(sheet.get("data", [])) for sheet in sheets
+    }
+
+
+def get_cell_value(cell: DictStrAny) -> Any:
+    """
+    Returns the value of a grid data cell the way values are returned for `UNFORMATTED_VALUE` render option.
+
+    Args:
+        cell (DictStrAny): Cell data with `effectiveValue`.
+
+    Returns:
+        Any: The number, string or boolean in the cell, error code for errors or empty string for empty cells.
+    """
+    effective_value = cell.get("effectiveValue")
+    if not effective_value:
+        return ""
+    if "errorValue" in effective_value:
+        return ERROR_VALUES.get(effective_value["errorValue"].get("type"), "#ERROR!")
+    return next(iter(effective_value.values()))
+
+
+def add_formatted_values(cells: List[DictStrAny]) -> List[DictStrAny]:
+    """
+    Sets `formattedValue` of cells requested without it, as the unformatted value converted to string.
+
+    Args:
+        cells (List[DictStrAny]): Cell data with `effectiveValue`.
+
+    Returns:
+        List[DictStrAny]: Cell data with `formattedValue` for non empty cells.
+    """
+    return [
+        {**cell, "formattedValue": str(get_cell_value(cell))}
+        if "effectiveValue" in cell
+        else cell
+        for cell in cells
+    ]
+
+
+def get_grid_values(row_data: List[DictStrAny]) -> List[List[Any]]:
+    """
+    Converts grid data rows into values, dropping empty cells at the end of rows and empty rows at the end of the range
+    like the values API does.
+
+    Args:
+        row_data (List[DictStrAny]): `rowData` of grid data.
+
+    Returns:
+        List[List[Any]]: Values of the range.
+    """
+    range_values = []
+    for row in row_data:
+        values = [get_cell_value(cell) for cell in row.get("values", [])]
+        while values and values[-1] == "":
+            values.pop()
+        range_values.append(values)
+    while range_values and not range_values[-1]:
+        range_values.pop()
+    return range_values
+
+
+def get_range_headers(
+    headers_metadata: List[DictStrAny],
+    range_name: str,
+    naming: Optional[NamingConvention] = None,
+) -> List[str]:
     """
     Retrieves the headers for columns from the metadata of a range.
 
     Args:
         headers_metadata (List[DictStrAny]): Metadata for the first 2 rows of a range.
         range_name (str): The name of the range as appears in the metadata.
+        naming (Optional[NamingConvention], optional): Naming convention of the source schema, taken from the dlt
+            context if not passed.
 
     Returns:
         List[str]: A list of headers.
@@ -163,9 +349,8 @@ def get_range_headers(headers_metadata: List[DictStrAny], range_name: str) -> Li
         headers.append(header_val)
 
     # make sure that headers are unique, first normalize the headers
-    header_mappings = {
-        h: dlt.current.source_schema().naming.normalize_identifier(h) for h in headers
-    }
+    naming = naming or dlt.current.source_schema().naming
+    header_mappings = {h: naming.normalize_identifier(h) for h in headers}
     if len(set(header_mappings.values())) != len(headers):
         logger.warning(
             "Header names must be unique otherwise you risk that data in columns with duplicate header names to be lost. Note that several destinations require "
@@ -207,6 +392,71 @@ def get_data_types(data_row_metadata: List[DictStrAny]) -> List[Optional[TDataTy
         return []
 
 
+def get_range_fingerprint(
+    parsed_range: ParsedRange, range_values: List[List[Any]]
+) -> str:
+    """
+    Computes a fingerprint of the location and values of a range, used to detect ranges that did not change between runs.
+
+    Args:
+        parsed_range (ParsedRange): The range after trimming empty rows and columns.
+        range_values (List[List[Any]]): Values of the range as returned by the API.
+
+    Returns:
+        str: A hex digest that changes whenever the range moves or any of its values changes.
+    """
+    payload = json.dumps([str(parsed_range), range_values], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def infer_data_types(
+    sheet_values: List[List[Any]],
+    headers: List[str],
+    data_types: List[Optional[TDataType]],
+    sample_size: Optional[int] = None,
+) -> List[Optional[TDataType]]:
+    """
+    Infers the data type of each column from the types of its values, so that dlt does not infer them from the first row
+    and create variant columns for the rows that do not fit. Numbers are always doubles and columns mixing numbers, text
+    and booleans are text, which dlt coerces all values to.
+
+    Dates and times are returned as serial numbers, so columns formatted as dates in the metadata stay dates or timestamps
+    if all their values are numbers. Otherwise they are typed like any other column, ie. text when numbers are mixed with
+    text such as "N/A".
+
+    Args:
+        sheet_values (List[List[Any]]): range values without the header row
+        headers (List[str]): names of the headers
+        data_types (List[Optional[TDataType]]): "timestamp" and "date" or None for each column, as returned by `get_data_types`
+        sample_size (Optional[int]): number of rows to sample, None to sample all rows
+
+    Returns:
+        List[Optional[TDataType]]: The data type of each header, None for columns without data
+    """
+    sample = sheet_values if sample_size is None else sheet_values[:sample_size]
+    value_types: List[Set[type]] = [set() for _ in headers]
+    for row in sample:
+        for idx, val in enumerate(row[: len(headers)]):
+            if val != "":
+                value_types[idx].add(type(val))
+
+    inferred: List[Optional[TDataType]] = []
+    for idx, types in enumerate(value_types):
+        date_type = data_types[idx] if idx < len(data_types) else None
+        if not types:
+            inferred.append(None)
+        elif date_type in ["timestamp", "date"] and types <= {int, float}:
+            inferred.append(date_type)
+        elif types <= {int, float}:
+            # whole numbers come as ints but there are only doubles in Google Sheets
+            inferred.append("double")
+        elif len(types) == 1:
+            inferred.append(py_type_to_sc_type(types.pop()))
+        else:
+            inferred.append("text")
+    return inferred
+
+
 def serial_date_to_datetime(
     serial_number: Union[int, float], data_type: TDataType
 ) -> Union[pendulum.DateTime, pendulum.Date]:
@@ -275,19 +525,157 @@ def process_range(
         yield table_dict
 
 
+def process_range_arrow(
+    sheet_values: List[List[Any]],
+    headers: List[str],
+    data_types: List[Optional[TDataType]],
+) -> Iterator[Any]:
+    """
+    Yields a range as a single Arrow table, same as `process_range` but column by column: values are transposed once and
+    serial numbers in date and timestamp columns are converted with vectorized Arrow compute functions. dlt does not need
+    to normalize Arrow tables row by row.
+
+    Arrow columns hold a single type so ranges with columns mixing types (ie. text in a date column) are yielded as
+    dictionaries by `process_range`, for dlt to create variant columns, unless `data_types` tells that the column is text
+    (see `infer_data_types`). Columns of whole numbers typed as double are converted to doubles.
+
+    Args:
+        sheet_val (List[List[Any]]): range values without the header row
+        headers (List[str]): names of the headers
+        data_types: List[TDataType]: "timestamp" and "date" or None for each column, or the data types of all columns
+
+    Yields:
+        Any: A pyarrow.Table with a column for every header with data, or dictionaries if types are mixed.
+    """
+    from dlt.common.libs.pyarrow import pyarrow
+
+    # empty rows get ignored
+    rows = [row for row in sheet_values if row]
+    if not rows:
+        return
+    # data in columns without headers is dropped, like zip does in `process_range`
+    width = min(len(headers), len(data_types))
+    columns = list(zip_longest(*rows, fillvalue=""))[:width]
+
+    arrays = []
+    names = []
+    for header, data_type, column in zip(headers, data_types, columns):
+        # empty cells are returned as empty strings
+        values = [None if val == "" else val for val in column]
+        value_types = set(map(type, values)) - {type(None)}
+        if not value_types:
+            # columns without data are not created by dlt either
+            continue
+        if data_type in ["timestamp", "date"]:
+            if not value_types <= {int, float}:
+                break
+            arrays.append(serial_numbers_to_arrow(pyarrow.array(values), data_type))
+        elif data_type == "text" and value_types != {str}:
+            # coerce mixed values like dlt does for rows of a text column
+            arrays.append(
+                pyarrow.array(
+                    [
+                        None
+                        if val is None
+                        else coerce_value("text", py_type_to_sc_type(type(val)), val)
+                        for val in values
+                    ]
+                )
+            )
+        elif len(value_types) > 1 and value_types != {int, float}:
+            break
+        elif data_type == "double" and value_types <= {int, float}:
+            arrays.append(pyarrow.array(values, type=pyarrow.float64()))
+        else:
+            arrays.append(pyarrow.array(values))
+        names.append(header)
+    else:
+        yield pyarrow.Table.from_arrays(arrays, names=names)
+        return
+
+    logger.info(
+        f"Column {header} mixes {', '.join(sorted(t.__name__ for t in value_types))} values, yielding rows instead of Arrow"
+    )
+    yield from process_range(sheet_values, headers, data_types)
+
+
+def convert_range(
+    process: Callable[..., Iterator[Any]],
+    sheet_values: List[List[Any]],
+    headers: List[str],
+    data_types: List[Optional[TDataType]],
+) -> List[Any]:
+    """
+    Converts all values of a range at once with `process_range` or `process_range_arrow`, run by worker processes.
+
+    Args:
+        process (Callable[..., Iterator[Any]]): `process_range` or `process_range_arrow`.
+        sheet_values (List[List[Any]]): range values without the header row
+        headers (List[str]): names of the headers
+        data_types (List[Optional[TDataType]]): data types of the columns
+
+    Returns:
+        List[Any]: The rows or Arrow tables of the range.
+    """
+    return list(process(sheet_values, headers=headers, data_types=data_types))
+
+
+def serial_numbers_to_arrow(serial_numbers: Any, data_type: TDataType) -> Any:
+    """
+    Converts an Arrow array of serial numbers to timestamps or dates, rounded to the second like `serial_date_to_datetime`.
+
+    Args:
+        serial_numbers (pyarrow.Array): The Lotus Notes serial numbers, possibly with nulls.
+        data_type (TDataType): "timestamp" or "date".
+
+    Returns:
+        pyarrow.Array: UTC timestamps or dates.
+    """
+    from dlt.common.libs.pyarrow import pyarrow
+    import pyarrow.compute as pc
+
+    # the compute functions are generated when pyarrow is imported, so they are
+    # called by name to be known to type checkers
+    serial_days = serial_numbers.cast(pyarrow.float64())
+    seconds = pc.call_function(
+        "add",
+        [
+            pc.call_function(
+                "round", [pc.call_function("multiply", [serial_days, SECONDS_PER_DAY])]
+            ),
+            TIMESTAMP_CONST,
+        ],
+    )
+    if data_type == "date":
+        days = pc.call_function(
+            "floor", [pc.call_function("divide", [seconds, SECONDS_PER_DAY])]
+        )
+        return days.cast(pyarrow.int32()).cast(pyarrow.date32())
+    return seconds.cast(pyarrow.int64()).cast(pyarrow.timestamp("s", tz=DLT_TIMEZONE))
+
+
 def trim_range_top_left(
     parsed_range: ParsedRange, range_values: List[List[Any]]
 ) -> Tuple[ParsedRange, List[List[Any]]]:
-    # skip empty rows and then empty columns
+    """
+    Skips the empty rows and then the empty columns at the top left of a range. Values are trimmed in place, without
+    copying the rows or the list of rows.
+
+    Args:
+        parsed_range (ParsedRange): The location of the range.
+        range_values (List[List[Any]]): The values of the range, modified in place.
+
+    Returns:
+        Tuple[ParsedRange, List[List[Any]]]: The location of the trimmed range and its values.
+    """
     # skip empty rows
     shift_x = 0
     for row in range_values:
         if row:
             break
-        else:
-            shift_x += 1
+        shift_x += 1
     if shift_x > 0:
-        range_values = range_values[shift_x:]
+        del range_values[:shift_x]
     # skip empty columns
     shift_y = 0
     if len(range_values) > 0:
@@ -298,10 +686,12 @@ def trim_range_top_left(
                 break
         if shift_y > 0:
             # skip all columns
-            for idx, row in enumerate(range_values):
-                range_values[idx] = row[shift_y:]
+            for row in range_values:
+                del row[:shift_y]
+    if shift_x == 0 and shift_y == 0:
+        return parsed_range, range_values
     parsed_range = parsed_range._replace(
         start_row=parsed_range.start_row + shift_x,
-        start_col=ParsedRange.shift_column(parsed_range.start_col, shift_y),
+        start_col=column_letter(parsed_range.start_col_index + shift_y),
     )
     return parsed_range, range_values
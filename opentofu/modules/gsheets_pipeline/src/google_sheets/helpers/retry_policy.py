@@ -0,0 +1,139 @@
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar, Union, cast
+
+from dlt.sources.helpers.requests.retry import DEFAULT_RETRY_STATUS
+
+logger = logging.getLogger(__name__)
+
+TFun = TypeVar("TFun", bound=Callable[..., Any])
+
+
+class RetryPolicy:
+    """Retries calls to the Google APIs failing with transient errors.
+
+    The single place where calls are retried: the Google API client does not
+    retry on its own. Failed attempts are retried with exponential backoff and
+    full jitter, so that concurrent callers do not retry in lockstep, or after
+    the `Retry-After` delay sent with the error. Retries stop once
+    `max_retries` are used or when the next delay would end after the time
+    budget of the run, so that the run fails within the timeout of the
+    function instead of being killed while sleeping.
+
+    Attributes:
+        max_retries (int): The max number of retries of a single call.
+        backoff_factor (float): The base delay of the exponential backoff.
+        max_retry_delay (float): The max delay between two attempts.
+        deadline (float, optional): The monotonic time after which calls are
+            not retried anymore, None for no time budget.
+        calls (int): The number of calls made.
+        retries (int): The number of retried attempts.
+        wait_time (float): The seconds spent sleeping before retries.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_factor: float = 2.0,
+        max_retry_delay: float = 60.0,
+        time_budget: Optional[float] = None,
+    ):
+        self.backoff_factor = backoff_factor
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self.reset(max_retries, time_budget)
+
+    def reset(self, max_retries: int, time_budget: Optional[float] = None) -> None:
+        """Starts a new run: sets its retries and time budget and zeroes the counters.
+
+        Args:
+            max_retries (int): The max number of retries of a single call.
+            time_budget (float, optional): The seconds from now during which
+                calls may be retried, None for no time budget.
+        """
+        with self._lock:
+            self.max_retries = max_retries
+            self.deadline = (
+                time.monotonic() + time_budget if time_budget is not None else None
+            )
+            self.calls = 0
+            self.retries = 0
+            self.wait_time = 0.0
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Returns the counters of the current run."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "wait_time": round(self.wait_time, 3),
+            }
+
+    def __call__(self, fn: TFun) -> TFun:
+        """Decorates `fn` to be retried by this policy."""
+        # callables such as partials have no name
+        name = getattr(fn, "__name__", repr(fn))
+
+        @functools.wraps(fn)
+        def _retried(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                self.calls += 1
+            attempt = 0
+            while True:
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as exc:
+                    if not is_retryable(exc) or attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    delay = self._delay(attempt, exc)
+                    if self.deadline is not None and (
+                        time.monotonic() + delay > self.deadline
+                    ):
+                        logger.warning(
+                            f"Not retrying {name} after {exc!r}, the retry time budget of the run is used"
+                        )
+                        raise
+                    logger.warning(
+                        f"Retrying {name} in {delay:.1f}s after {exc!r} (retry {attempt} of {self.max_retries})"
+                    )
+                    with self._lock:
+                        self.retries += 1
+                        self.wait_time += delay
+                    time.sleep(delay)
+
+        return cast(TFun, _retried)
+
+    def _delay(self, attempt: int, exc: BaseException) -> float:
+        retry_after = _parse_retry_after(exc)
+        if retry_after is not None:
+            return retry_after
+        # full jitter
+        return random.uniform(
+            0, min(self.backoff_factor * 2 ** (attempt - 1), self.max_retry_delay)
+        )
+
+
+def is_retryable(exception: BaseException) -> bool:
+    """Retry condition on HttpError with a transient status and on connection errors"""
+    from googleapiclient.errors import HttpError  # type: ignore
+
+    if isinstance(exception, HttpError):
+        return exception.resp.status in DEFAULT_RETRY_STATUS
+    return isinstance(exception, (ConnectionError, TimeoutError))
+
+
+def _parse_retry_after(exception: BaseException) -> Optional[float]:
+    """Parses the `Retry-After` header of an HttpError, in seconds."""
+    resp = getattr(exception, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -1,6 +1,14 @@
 import dlt
 import functions_framework
 from google_sheets import google_spreadsheet
+from google_sheets.helpers.api_calls import retry_policy
+
+# Arrow tables get the dlt columns of rows as well, external tables expect them
+dlt.config["normalize.parquet_normalizer.add_dlt_load_id"] = True
+dlt.config["normalize.parquet_normalizer.add_dlt_id"] = True
+
+# destination table of each loaded range
+TABLE_NAMES = {"Data": "monthly_category_amounts", "Rate": "rate"}
 
 
 @functions_framework.http
@@ -13,15 +21,25 @@ def gsheets_pipeline(request):
         destination="filesystem",
         dataset_name="raw",
     )
-    monthly_category_amounts = google_spreadsheet(range_names=["Data", "Rate"])
-    monthly_category_amounts.resources["Data"].apply_hints(
-        table_name="monthly_category_amounts"
+    # restore the state first, it holds the fingerprints of the loaded ranges
+    pipeline.sync_destination()
+    # the ranges are small enough for their grid data to be fetched at once
+    monthly_category_amounts = google_spreadsheet(
+        range_names=list(TABLE_NAMES),
+        skip_unchanged=True,
+        fetch_grid_data=True,
+        data_format="arrow",
+        infer_types=True,
     )
-    monthly_category_amounts.resources["Rate"].apply_hints(table_name="rate")
+    # ranges that did not change are not part of the source
+    for range_name, resource in monthly_category_amounts.resources.items():
+        resource.apply_hints(table_name=TABLE_NAMES[range_name])
 
     monthly_category_amounts_info = pipeline.run(
         monthly_category_amounts, loader_file_format="parquet"
     )
     print(monthly_category_amounts_info)
+    # how much of the run waited on throttled or failed calls to the Google APIs
+    print(f"Google API calls: {retry_policy.stats}")
 
     return "Pipeline run successfully!"
@@ -0,0 +1,168 @@
+"""Benchmarks the whole Notion pipeline against a local stub server.
+
+Runs `main.notion_pipeline` end to end, from extraction to the delta table
+written to a local bucket, on synthetic databases of growing size. Each run
+happens in a fresh process so that its peak memory is measured on its own.
+Reports the rows loaded per second, the requests and throttled requests
+served and the peak RSS of each run.
+
+Responses recorded from the real API can be replayed with `--replay-dir`, and
+recorded with `--record` which forwards requests to the Notion API.
+
+Usage:
+    uv run --directory=opentofu/modules/notion_pipeline/src python ../benchmarks/bench_pipeline.py
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from stub_server import StubNotionServer  # noqa: E402
+
+DATABASE_ID = "benchmark"
+NOTION_API_URL = "https://api.notion.com/v1"
+
+
+def run_pipeline() -> None:
+    """Runs the pipeline configured by the environment and prints its elapsed
+    time and peak memory as the last line of the output"""
+    import dlt
+    import main
+
+    started = time.perf_counter()
+    main.notion_pipeline(None)
+    elapsed = time.perf_counter() - started
+    # kilobytes on Linux
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # replayed databases do not have the requested number of rows
+    trace = dlt.pipeline("notion_pipeline").last_trace
+    loaded = trace.last_normalize_info.row_counts.get("expenses", 0)
+    print(
+        json.dumps({"loaded": loaded, "elapsed": elapsed, "max_rss_mb": max_rss / 1024})
+    )
+
+
+def run(
+    rows: int,
+    latency: float,
+    throttle_every: int,
+    requests_per_second: float,
+    replay_dir: Optional[str],
+    upstream: Optional[str],
+    api_key: str,
+    database_id: str,
+) -> Dict[str, Any]:
+    with (
+        StubNotionServer(
+            rows,
+            latency=latency,
+            database_ids=(database_id,),
+            throttle_every=throttle_every,
+            replay_dir=replay_dir,
+            upstream=upstream,
+        ) as server,
+        tempfile.TemporaryDirectory() as tmp_dir,
+    ):
+        env = {
+            **os.environ,
+            "DLT_DATA_DIR": os.path.join(tmp_dir, "dlt"),
+            "DESTINATION__FILESYSTEM__BUCKET_URL": Path(tmp_dir, "bucket").as_uri(),
+            "SOURCES__NOTION__API_KEY": api_key,
+            "SOURCES__NOTION__API_URL": server.url,
+            "SOURCES__NOTION__DATABASE_ID": database_id,
+            "SOURCES__NOTION__REQUESTS_PER_SECOND": str(requests_per_second),
+            "RUNTIME__DLTHUB_TELEMETRY": "false",
+        }
+        process = subprocess.run(
+            [sys.executable, __file__, "--run-pipeline"],
+            cwd=SRC_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            sys.stderr.write(process.stdout + process.stderr)
+            raise RuntimeError(f"Pipeline run on {rows} rows failed")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        return {
+            "rows": rows,
+            "requests": server.requests,
+            "throttled": server.throttled,
+            "rows_per_second": result["loaded"] / result["elapsed"],
+            **result,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="server latency in seconds"
+    )
+    parser.add_argument(
+        "--throttle-every",
+        type=int,
+        default=0,
+        help="answer every n-th request with a 429, 0 to never throttle",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=1000,
+        help="rate limit of the client, lifted by default to measure the pipeline",
+    )
+    parser.add_argument(
+        "--replay-dir", help="directory of the responses to record or replay"
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="forward requests to the Notion API and record them in --replay-dir",
+    )
+    parser.add_argument("--run-pipeline", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_pipeline:
+        run_pipeline()
+        return
+    if args.record and not args.replay_dir:
+        parser.error("--record requires --replay-dir")
+
+    # recording needs a real database, replaying needs the recorded one
+    database_id = os.environ.get("SOURCES__NOTION__DATABASE_ID", DATABASE_ID)
+    api_key = os.environ.get("SOURCES__NOTION__API_KEY", "secret")
+
+    print(
+        f"{'rows':>10}{'loaded':>10}{'total s':>10}{'rows/s':>10}{'requests':>10}"
+        f"{'throttled':>10}{'peak MB':>10}"
+    )
+    for rows in args.rows:
+        result = run(
+            rows,
+            args.latency,
+            args.throttle_every,
+            args.requests_per_second,
+            args.replay_dir,
+            NOTION_API_URL if args.record else None,
+            api_key,
+            database_id,
+        )
+        print(
+            f"{result['rows']:>10}{result['loaded']:>10}{result['elapsed']:>10.2f}"
+            f"{result['rows_per_second']:>10.0f}{result['requests']:>10}"
+            f"{result['throttled']:>10}{result['max_rss_mb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
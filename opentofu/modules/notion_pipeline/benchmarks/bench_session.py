@@ -0,0 +1,102 @@
+"""Benchmarks connection reuse of NotionClient against a local stub server.
+
+Queries a synthetic database page by page, once opening a new connection per
+request like bare `requests.post` does, and once through the pooled session
+owned by `NotionClient`. Reports the connections opened and the per-page
+latency of both.
+
+Usage:
+    uv run --directory=opentofu/modules/notion_pipeline/src python ../benchmarks/bench_session.py
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from notion.helpers.client import NotionClient  # noqa: E402
+from notion.helpers.database import NotionDatabase  # noqa: E402
+from stub_server import StubNotionServer  # noqa: E402
+
+DATABASE_ID = "benchmark"
+
+
+def query_without_session(api_url: str) -> Iterator[List[Any]]:
+    """Pages through the database with a new connection per request"""
+    start_cursor = None
+    while True:
+        response = requests.post(
+            f"{api_url}/databases/{DATABASE_ID}/query",
+            json={"start_cursor": start_cursor, "page_size": 100},
+        )
+        response.raise_for_status()
+        body = response.json()
+        yield body["results"]
+        if not body["has_more"]:
+            break
+        start_cursor = body["next_cursor"]
+
+
+def query_with_client(api_url: str) -> Iterator[List[Any]]:
+    """Pages through the database with NotionClient"""
+    # lift the rate limit so that only connection reuse is measured
+    client = NotionClient("secret", api_url=api_url, requests_per_second=1000)
+    yield from NotionDatabase(DATABASE_ID, client).query(page_size=100)
+
+
+def run(
+    name: str, query: Callable[[str], Iterator[List[Any]]], rows: int, latency: float
+) -> Dict[str, Any]:
+    with StubNotionServer(rows, latency=latency) as server:
+        latencies = []
+        loaded = 0
+        started = last = time.perf_counter()
+        for page in query(server.url):
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+            loaded += len(page)
+        elapsed = time.perf_counter() - started
+        assert loaded == rows, f"{name} loaded {loaded} rows instead of {rows}"
+        return {
+            "name": name,
+            "connections": server.connections,
+            "requests": server.requests,
+            "elapsed": elapsed,
+            "p50": statistics.median(latencies),
+            "p95": statistics.quantiles(latencies, n=20)[-1],
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="server latency in seconds"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<20}{'connections':>12}{'requests':>10}"
+        f"{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+    )
+    for name, query in [
+        ("new connection", query_without_session),
+        ("pooled session", query_with_client),
+    ]:
+        result = run(name, query, args.rows, args.latency)
+        print(
+            f"{result['name']:<20}{result['connections']:>12}{result['requests']:>10}"
+            f"{result['elapsed']:>10.2f}{result['p50'] * 1000:>10.2f}"
+            f"{result['p95'] * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
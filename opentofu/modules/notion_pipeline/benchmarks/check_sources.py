@@ -0,0 +1,123 @@
+"""Checks the configurations of the Notion source against a local stub server.
+
+Loads a synthetic database with `notion_databases` called the ways the source
+supports, nested or flattened, named or looked up by title, replaced or
+incremental, into a local bucket. Each configuration loads twice, with a few
+pages edited and removed in between, and fails unless the first run loads all
+the rows and the second one all the rows left when replaced, or only the
+edited pages and the tombstones of the removed ones when incremental. Run it
+after changing the source.
+
+Usage:
+    uv run --directory=opentofu/modules/notion_pipeline/src python ../benchmarks/check_sources.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import dlt  # noqa: E402
+from notion import notion_databases  # noqa: E402
+from stub_server import StubNotionServer  # noqa: E402
+
+DATABASE_ID = "check"
+# pages edited and removed between the two runs, by index
+EDITED_PAGES = (3, 17, 101)
+REMOVED_PAGES = (5, 42)
+# after the `last_edited_time` of all synthetic pages
+EDITED_TIME = "2025-02-01T00:00:00.000Z"
+
+# name -> (database entry, keyword arguments of `notion_databases`)
+CONFIGURATIONS: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {
+    # nested pages of a named database are never cached nor revalidated
+    "nested, named": ({"use_name": "expenses"}, {}),
+    "nested, looked up by title": ({}, {}),
+    "flattened, named": ({"use_name": "expenses"}, {"flatten": True}),
+    "flattened, incremental, arrow": (
+        {"use_name": "expenses"},
+        {
+            "flatten": True,
+            "incremental": True,
+            "data_format": "arrow",
+            "prefetch": True,
+            "reconcile": True,
+        },
+    ),
+}
+
+
+def expected_rows(rows: int, options: Dict[str, Any]) -> List[int]:
+    """Returns the rows the two runs of a configuration are expected to load"""
+    if not options.get("incremental"):
+        return [rows, rows - len(REMOVED_PAGES)]
+    tombstones = len(REMOVED_PAGES) if options.get("reconcile") else 0
+    return [rows, len(EDITED_PAGES) + tombstones]
+
+
+def check(
+    name: str, database: Dict[str, Any], options: Dict[str, Any], rows: int
+) -> List[int]:
+    """Loads the database twice with one configuration, editing and removing
+    pages in between, and returns the rows loaded by each run"""
+    loaded = []
+    with (
+        StubNotionServer(rows, database_ids=(DATABASE_ID,)) as server,
+        tempfile.TemporaryDirectory() as tmp_dir,
+    ):
+        pipeline = dlt.pipeline(
+            pipeline_name=f"check_{name.replace(', ', '_').replace(' ', '_')}",
+            pipelines_dir=os.path.join(tmp_dir, "pipelines"),
+            destination=dlt.destinations.filesystem(Path(tmp_dir, "bucket").as_uri()),
+            dataset_name="raw",
+        )
+        for _ in range(2):
+            source = notion_databases(
+                database_ids=[{"id": DATABASE_ID, **database}],
+                api_key="secret",
+                api_url=server.url,
+                **options,
+            )
+            pipeline.run(
+                source,
+                table_name="expenses",
+                loader_file_format="parquet",
+                # merging is only supported for table formats
+                table_format="delta" if options.get("incremental") else None,
+            )
+            row_counts = pipeline.last_trace.last_normalize_info.row_counts
+            loaded.append(row_counts.get("expenses", 0))
+            server.edited.update(dict.fromkeys(EDITED_PAGES, EDITED_TIME))
+            server.removed.update(REMOVED_PAGES)
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=250)
+    args = parser.parse_args()
+    os.environ["RUNTIME__DLTHUB_TELEMETRY"] = "false"
+
+    failed: List[str] = []
+    for name, (database, options) in CONFIGURATIONS.items():
+        expected = expected_rows(args.rows, options)
+        try:
+            loaded = check(name, database, options, args.rows)
+        except Exception as exc:
+            loaded = []
+            print(f"{name:<32}failed: {exc!r}")
+        else:
+            print(f"{name:<32}{loaded[0]:>8} rows, then {loaded[1]:>6} rows")
+        if loaded != expected:
+            failed.append(f"{name}: expected {expected[0]}, then {expected[1]} rows")
+
+    if failed:
+        sys.exit("Configurations not loading the expected rows:\n" + "\n".join(failed))
+
+
+if __name__ == "__main__":
+    main()
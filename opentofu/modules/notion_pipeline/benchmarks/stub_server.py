@@ -0,0 +1,361 @@
+"""A local stand-in for the Notion API used by the benchmarks.
+
+Serves synthetic databases through the `search`, `databases/{id}` and
+`databases/{id}/query` endpoints, paginated like the real API, and counts the
+TCP connections and requests it receives so that connection reuse can be
+measured. Latency and throttled (429) responses can be injected. Pages can be
+edited or removed between runs, and queries apply the `last_edited_time`
+timestamp filter of incremental loads.
+
+Responses can also be recorded from the real API and replayed: with
+`upstream` set, requests are forwarded and their responses saved in
+`replay_dir`, and without it responses found in `replay_dir` are served
+instead of synthetic ones.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+# Notion returns at most 100 results per page
+MAX_PAGE_SIZE = 100
+
+# schema of the synthetic databases, by property name
+PROPERTIES = {
+    "Name": {"id": "title", "type": "title", "title": {}},
+    "Amount": {"id": "amnt", "type": "number", "number": {"format": "euro"}},
+    "Category": {
+        "id": "ctgr",
+        "type": "select",
+        "select": {"options": [{"id": "1", "name": "Groceries", "color": "green"}]},
+    },
+    "Date": {"id": "date", "type": "date", "date": {}},
+    "Credit": {"id": "crdt", "type": "checkbox", "checkbox": {}},
+}
+
+
+def make_database(database_id: str) -> Dict[str, Any]:
+    """Returns a synthetic expense database shaped like a Notion database"""
+    return {
+        "object": "database",
+        "id": database_id,
+        "created_time": "2025-01-01T00:00:00.000Z",
+        "last_edited_time": "2025-01-01T00:00:00.000Z",
+        "title": [{"type": "text", "plain_text": f"Expenses {database_id}"}],
+        "properties": {
+            name: {"name": name, **schema} for name, schema in PROPERTIES.items()
+        },
+        "archived": False,
+        "in_trash": False,
+    }
+
+
+def last_edited_time(idx: int) -> str:
+    """Returns the time a synthetic page was created and last edited, a
+    distinct minute for each of the first 1440 pages"""
+    return f"2025-01-01T{idx // 60 % 24:02d}:{idx % 60:02d}:00.000Z"
+
+
+def make_page(
+    database_id: str, idx: int, edited_time: Optional[str] = None
+) -> Dict[str, Any]:
+    """Returns a synthetic expense page shaped like a Notion page object"""
+    return {
+        "object": "page",
+        "id": f"00000000-0000-0000-0000-{idx:012d}",
+        "created_time": "2025-01-01T00:00:00.000Z",
+        "last_edited_time": edited_time or last_edited_time(idx),
+        "archived": False,
+        "in_trash": False,
+        "parent": {"type": "database_id", "database_id": database_id},
+        "properties": {
+            "Name": {
+                "id": "title",
+                "type": "title",
+                "title": [{"type": "text", "plain_text": f"Expense {idx}"}],
+            },
+            "Amount": {"id": "amnt", "type": "number", "number": idx % 100 + 0.5},
+            "Category": {
+                "id": "ctgr",
+                "type": "select",
+                "select": {"id": "1", "name": "Groceries", "color": "green"},
+            },
+            "Date": {
+                "id": "date",
+                "type": "date",
+                "date": {"start": f"2025-01-{idx % 28 + 1:02d}"},
+            },
+            "Credit": {"id": "crdt", "type": "checkbox", "checkbox": False},
+        },
+        "url": f"https://www.notion.so/{idx}",
+    }
+
+
+def matches_filter(page_filter: Optional[Dict[str, Any]], edited_time: str) -> bool:
+    """Tells whether a page edited at `edited_time` passes a query filter,
+    only the `last_edited_time` timestamp filter is applied"""
+    if not page_filter or page_filter.get("timestamp") != "last_edited_time":
+        return True
+    on_or_after = page_filter["last_edited_time"].get("on_or_after")
+    return on_or_after is None or datetime.fromisoformat(
+        edited_time
+    ) >= datetime.fromisoformat(on_or_after)
+
+
+def page_window(body: Dict[str, Any], total: int) -> Tuple[int, int]:
+    """Returns the start and end index of the page requested in `body`"""
+    start = int(body.get("start_cursor") or 0)
+    page_size = min(body.get("page_size") or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    return start, min(start + page_size, total)
+
+
+def list_response(
+    results: List[Dict[str, Any]], end: int, total: int
+) -> Dict[str, Any]:
+    """Returns a paginated list response ending at index `end`"""
+    has_more = end < total
+    return {
+        "object": "list",
+        "results": results,
+        "next_cursor": str(end) if has_more else None,
+        "has_more": has_more,
+    }
+
+
+class StubNotionServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server keeping connections alive like api.notion.com
+
+    Attributes:
+        rows (int): Number of pages in each synthetic database.
+        latency (float): Seconds to wait before answering each request.
+        database_ids (Sequence[str]): Ids of the databases found by `search`,
+            any other id can still be queried.
+        throttle_every (int): Answer every n-th request with a 429, 0 to never
+            throttle.
+        retry_after (float): Seconds sent in the `Retry-After` header of
+            throttled responses.
+        replay_dir (str, optional): Directory of the recorded responses.
+        upstream (str, optional): URL of the API to record responses from.
+        edited (Dict[int, str]): New `last_edited_time` of the edited pages,
+            by index.
+        removed (Set[int]): Indexes of the pages removed from the databases.
+        connections (int): Number of accepted TCP connections.
+        requests (int): Number of served requests.
+        throttled (int): Number of throttled requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        rows: int,
+        latency: float = 0.0,
+        port: int = 0,
+        database_ids: Sequence[str] = ("benchmark",),
+        throttle_every: int = 0,
+        retry_after: float = 1.0,
+        replay_dir: Optional[str] = None,
+        upstream: Optional[str] = None,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), StubNotionHandler)
+        self.rows = rows
+        self.latency = latency
+        self.database_ids = database_ids
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.replay_dir = replay_dir
+        self.upstream = upstream
+        self.edited: Dict[int, str] = {}
+        self.removed: Set[int] = set()
+        self.connections = 0
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def count_request(self) -> bool:
+        """Counts a request and tells whether it has to be throttled"""
+        with self._lock:
+            self.requests += 1
+            throttle = (
+                self.throttle_every > 0 and self.requests % self.throttle_every == 0
+            )
+            if throttle:
+                self.throttled += 1
+            return throttle
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        object_type = (body.get("filter") or {}).get("value", "database")
+        database_ids = self.database_ids if object_type == "database" else []
+        start, end = page_window(body, len(database_ids))
+        results = [make_database(database_id) for database_id in database_ids]
+        return list_response(results[start:end], end, len(database_ids))
+
+    def query_database(
+        self,
+        database_id: str,
+        body: Dict[str, Any],
+        filter_properties: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        indexes = [
+            idx
+            for idx in range(self.rows)
+            if idx not in self.removed
+            and matches_filter(
+                body.get("filter"), self.edited.get(idx) or last_edited_time(idx)
+            )
+        ]
+        start, end = page_window(body, len(indexes))
+        pages = [
+            make_page(database_id, idx, self.edited.get(idx))
+            for idx in indexes[start:end]
+        ]
+        if filter_properties is not None:
+            for page in pages:
+                page["properties"] = {
+                    name: value
+                    for name, value in page["properties"].items()
+                    if value["id"] in filter_properties
+                }
+        return list_response(pages, end, len(indexes))
+
+    def route(
+        self, method: str, path: str, body: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Answers a request with synthetic data"""
+        url = urlsplit(path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+        # v1/search
+        if method == "POST" and parts[1:] == ["search"]:
+            return 200, self.search(body)
+        # v1/databases/{id}
+        if method == "GET" and len(parts) == 3 and parts[1] == "databases":
+            return 200, make_database(parts[2])
+        # v1/databases/{id}/query
+        if (
+            method == "POST"
+            and len(parts) == 4
+            and parts[1] == "databases"
+            and parts[3] == "query"
+        ):
+            return 200, self.query_database(
+                parts[2], body, query.get("filter_properties")
+            )
+        return 404, {"object": "error", "status": 404, "code": "object_not_found"}
+
+    def replay_path(self, method: str, path: str, body: Dict[str, Any]) -> str:
+        """Returns the file of the recorded response to a request"""
+        key = json.dumps([method, path, body], sort_keys=True).encode()
+        digest = hashlib.sha1(key).hexdigest()[:16]
+        endpoint = urlsplit(path).path.strip("/").replace("/", "_")
+        return os.path.join(self.replay_dir or "", f"{method}_{endpoint}_{digest}.json")
+
+    def record(
+        self, method: str, path: str, headers: Dict[str, str], body: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Forwards a request to the real API and records its response"""
+        response = requests.request(
+            method,
+            self.upstream.rstrip("/") + path[len("/v1") :],  # type: ignore[union-attr]
+            headers=headers,
+            json=body if method == "POST" else None,
+        )
+        if response.ok and self.replay_dir:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            with open(self.replay_path(method, path, body), "w") as f:
+                json.dump(response.json(), f)
+        return response.status_code, response.json()
+
+    def replay(
+        self, method: str, path: str, body: Dict[str, Any]
+    ) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Returns the recorded response to a request, if any"""
+        replay_path = self.replay_path(method, path, body)
+        if not os.path.exists(replay_path):
+            return None
+        with open(replay_path) as f:
+            return 200, json.load(f)
+
+    def __enter__(self) -> "StubNotionServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StubNotionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubNotionServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(
+        self,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, method: str) -> None:
+        throttle = self.server.count_request()
+        body = self._read_json() if method == "POST" else {}
+        time.sleep(self.server.latency)
+        if throttle:
+            self._send_json(
+                429,
+                {"object": "error", "status": 429, "code": "rate_limited"},
+                {"Retry-After": str(self.server.retry_after)},
+            )
+            return
+
+        if self.server.upstream:
+            headers = {
+                name: self.headers[name]
+                for name in ("Authorization", "Notion-Version")
+                if self.headers.get(name)
+            }
+            status, response = self.server.record(method, self.path, headers, body)
+        else:
+            replayed = None
+            if self.server.replay_dir:
+                replayed = self.server.replay(method, self.path, body)
+            status, response = replayed or self.server.route(method, self.path, body)
+        self._send_json(status, response)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
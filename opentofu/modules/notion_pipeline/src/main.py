@@ -1,8 +1,66 @@
+import logging
 import os
+import time
 
 import dlt
 import functions_framework
+from dlt.common.destination.exceptions import DestinationUndefinedEntity
+from dlt.common.libs.deltalake import get_delta_tables
+from dlt.common.typing import TDataItem
+from dlt.pipeline.pipeline import Pipeline
+from marts import build_marts
 from notion import notion_databases
+from notion.helpers.tracing import RequestStats
+
+# one JSON line per summary, parsed into structured entries by Cloud Logging
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+# Arrow tables get the dlt columns of rows as well, so that the expenses keep
+# the columns they had when pages were loaded as objects
+dlt.config["normalize.parquet_normalizer.add_dlt_load_id"] = True
+dlt.config["normalize.parquet_normalizer.add_dlt_id"] = True
+
+# expenses are partitioned by month, "YYYY-MM", so that readers filtering on a
+# month only scan the files of that month
+PARTITION_COLUMN = "date_month"
+
+# folder of the dataset holding the request summary of each run, one file per
+# load, as the load packages are deleted with the instance running the function
+REQUESTS_DIR = "_notion_requests"
+
+
+def add_date_month(item: TDataItem) -> TDataItem:
+    """Adds the month of the `date` of a record or an Arrow table of records,
+    tombstones have no date and are left as is
+    """
+    if isinstance(item, dict):
+        if "date" in item:
+            date = item["date"]
+            item[PARTITION_COLUMN] = date.strftime("%Y-%m") if date else None
+        return item
+    if "date" not in item.column_names:
+        return item
+    import pyarrow.compute as pc
+
+    # called by name, the compute functions generated by pyarrow are unknown to type checkers
+    date_month = pc.call_function(
+        "strftime", [item["date"]], pc.StrftimeOptions("%Y-%m")
+    )
+    return item.append_column(PARTITION_COLUMN, date_month)
+
+
+def is_partitioned(pipeline: Pipeline, table_name: str) -> bool:
+    """Tells if the Delta table is partitioned by month, or not loaded yet.
+
+    Merges keep the partitioning of the existing table, a table loaded before
+    the partitioning was introduced must be reloaded to be partitioned.
+    """
+    try:
+        delta_table = get_delta_tables(pipeline, table_name)[table_name]
+    except (ValueError, DestinationUndefinedEntity):
+        # created partitioned by the first load
+        return True
+    return PARTITION_COLUMN in delta_table.metadata().partition_columns
 
 
 @functions_framework.http
@@ -17,19 +75,49 @@ def notion_pipeline(request):
         destination="filesystem",
         dataset_name="raw",
     )
-    expenses = notion_databases(database_ids=[{"id": database_id}])
+    request_stats = RequestStats()
+    # restore the state first, it holds the cached schema of the database
+    pipeline.sync_destination()
+    expenses = notion_databases(
+        database_ids=[{"id": database_id}],
+        incremental=True,
+        flatten=True,
+        prefetch=True,
+        data_format="arrow",
+        reconcile=True,
+        tracer=request_stats,
+    )
+    for resource in expenses.resources.values():
+        resource.add_map(add_date_month)
+        resource.apply_hints(
+            columns={PARTITION_COLUMN: {"data_type": "text", "partition": True}}
+        )
+    # drops the table and the incremental state of the resources, so that all
+    # pages are queried again and written partitioned
+    refresh = None if is_partitioned(pipeline, "expenses") else "drop_resources"
 
     expenses_info = pipeline.run(
         expenses,
         table_name="expenses",
-        columns={
-            "properties__amount__number": {"data_type": "double"},
-            "properties__amount_brl__number": {"data_type": "double"},
-            "properties__date__date__start": {"data_type": "date"},
-            "properties__debit_credit__formula__number": {"data_type": "double"},
-        },
         loader_file_format="parquet",
+        # merging on `id` is only supported by the filesystem destination for
+        # table formats, plain parquet files would be appended
+        table_format="delta",
+        refresh=refresh,
     )
     print(expenses_info)
 
+    request_stats.log_summary()
+    client = pipeline.destination_client()
+    # runs loading nothing are named after the current time, like load ids
+    load_id = (
+        expenses_info.loads_ids[-1] if expenses_info.loads_ids else str(time.time())
+    )
+    request_stats.write(
+        client.get_table_dir(REQUESTS_DIR), f"{load_id}.json", client.fs_client
+    )
+
+    # the marts read by the data explorer, derived from the loaded raw tables
+    print(build_marts(pipeline))
+
     return "Pipeline run successfully!"
@@ -0,0 +1,143 @@
+"""Curated tables derived from the raw tables after each load.
+
+The Notion pipeline rebuilds the marts right after loading the expenses, from
+the rates and budgets last loaded by the Google Sheets pipeline. It is their
+only writer: replacing a table deletes its files before writing the new ones,
+so two pipelines replacing the marts on their own schedules could interleave
+and leave the files of both runs.
+"""
+
+import logging
+from typing import Any, Dict, Optional, cast
+
+import dlt
+import duckdb
+from dlt.common.libs.deltalake import deltalake_storage_options
+from dlt.common.pipeline import LoadInfo
+from dlt.destinations.impl.filesystem.filesystem import FilesystemClient
+from dlt.pipeline.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+MART_DATASET = "mart"
+
+# expenses converted to EUR at the rate of their date, credits counted
+# negative and tombstones of deleted pages left out
+EXPENSES_EUR_SQL = """
+    SELECT
+        date: expenses.date,
+        category,
+        name,
+        expenses.date_month,
+        amount: ROUND(
+            IF(credit, -1, 1) *
+            COALESCE(expenses.amount, amount_brl / eur_brl),
+            2
+        )
+    FROM expenses
+    ASOF JOIN rate
+        ON expenses.date >= rate.date
+    WHERE NOT COALESCE(expenses.is_deleted, false)
+"""
+
+# budget of each month and category next to what was spent and what is left
+MONTHLY_CATEGORY_BUDGET_SQL = """
+    WITH monthly_budget AS (
+        SELECT
+            date_month: strftime(month, '%Y-%m'),
+            category,
+            budget: ROUND(budget_eur, 2)
+        FROM monthly_category_amounts
+    ),
+    monthly_expenses AS (
+        SELECT date_month, category, amount: SUM(amount)
+        FROM expenses_eur
+        GROUP BY date_month, category
+    )
+    SELECT
+        date_month,
+        category,
+        budget,
+        expenses: COALESCE(amount, 0),
+        remaining_budget: ROUND(COALESCE(budget, 0) - COALESCE(amount, 0), 2)
+    FROM monthly_budget
+    LEFT JOIN monthly_expenses USING (date_month, category)
+"""
+
+
+def read_raw_tables(pipeline: Pipeline) -> Optional[Dict[str, Any]]:
+    """Opens the raw tables the marts are derived from as Arrow datasets.
+
+    Args:
+        pipeline (Pipeline): A pipeline loading into the raw dataset of
+            the bucket.
+
+    Returns:
+        Dict[str, Any], optional: The Arrow dataset of each raw table, None if
+            one of them was not loaded yet, e.g. before the first run of the
+            Google Sheets pipeline.
+    """
+    import pyarrow.dataset as ds
+    from deltalake import DeltaTable
+
+    # both pipelines load into the raw dataset of the bucket
+    client = cast(FilesystemClient, pipeline.destination_client())
+    tables: Dict[str, Any] = {}
+    # the expenses are merged into a Delta table, the other tables replaced
+    expenses_location = client.get_open_table_location("delta", "expenses")
+    storage_options = deltalake_storage_options(client.config)
+    if not DeltaTable.is_deltatable(expenses_location, storage_options):
+        return None
+    tables["expenses"] = DeltaTable(
+        expenses_location, storage_options=storage_options
+    ).to_pyarrow_dataset()
+    for table_name in ("rate", "monthly_category_amounts"):
+        table_dir = client.get_table_dir(table_name)
+        if not client.fs_client.exists(table_dir):
+            return None
+        tables[table_name] = ds.dataset(
+            table_dir, format="parquet", filesystem=client.fs_client
+        )
+    return tables
+
+
+def build_marts(pipeline: Pipeline) -> Optional[LoadInfo]:
+    """Materializes `mart.expenses_eur` and `mart.monthly_category_budget`
+    from the raw tables with DuckDB and replaces them in the bucket.
+
+    Args:
+        pipeline (Pipeline): The pipeline which just loaded its raw tables.
+
+    Returns:
+        LoadInfo, optional: The load info of the marts, None if they could not
+            be built because a raw table is missing.
+    """
+    raw_tables = read_raw_tables(pipeline)
+    if raw_tables is None:
+        logger.warning("Marts not built, a raw table was not loaded yet")
+        return None
+
+    duckdb_conn = duckdb.connect()
+    for table_name, dataset in raw_tables.items():
+        duckdb_conn.register(table_name, dataset)
+    expenses_eur = duckdb_conn.sql(EXPENSES_EUR_SQL).fetch_arrow_table()
+    duckdb_conn.register("expenses_eur", expenses_eur)
+    monthly_category_budget = duckdb_conn.sql(
+        MONTHLY_CATEGORY_BUDGET_SQL
+    ).fetch_arrow_table()
+    duckdb_conn.close()
+
+    # a pipeline of its own, so that the state of the raw tables is not touched
+    mart_pipeline = dlt.pipeline(
+        pipeline_name=f"{pipeline.pipeline_name}_marts",
+        destination=pipeline.destination,
+        dataset_name=MART_DATASET,
+    )
+    return mart_pipeline.run(
+        [
+            dlt.resource(expenses_eur, name="expenses_eur"),
+            dlt.resource(monthly_category_budget, name="monthly_category_budget"),
+        ],
+        write_disposition="replace",
+        loader_file_format="parquet",
+    )
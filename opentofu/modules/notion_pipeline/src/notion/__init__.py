@@ -1,18 +1,42 @@
 """A source that extracts data from Notion API"""
 
-from typing import List, Dict, Optional, Iterator
+import logging
+from typing import Any, List, Dict, Optional, Iterator
 
 import dlt
+from dlt.common.time import ensure_pendulum_datetime
 from dlt.common.typing import TDataItems
 from dlt.sources import DltResource
 
+from .helpers.blocks import fetch_block_trees
 from .helpers.client import NotionClient
 from .helpers.database import NotionDatabase
+from .helpers.projection import PageProjection
+from .helpers.schema_cache import STATE_KEY as SCHEMA_CACHE_KEY, SchemaCache
+from .helpers.tracing import TRequestHook
+from .settings import (
+    API_URL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_REQUESTS_PER_SECOND,
+)
+
+logger = logging.getLogger(__name__)
+
+# key of the ids of the pages listed by the last run in the source state
+PAGE_IDS_KEY = "page_ids"
 
 
 @dlt.resource
 def notion_pages(
-    page_ids: Optional[List[str]] = None, api_key: str = dlt.secrets.value
+    page_ids: Optional[List[str]] = None,
+    api_key: str = dlt.secrets.value,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    tracer: Optional[TRequestHook] = None,
+    api_url: str = API_URL,
 ) -> Iterator[TDataItems]:
     """
     Retrieves pages from Notion.
@@ -22,63 +46,347 @@ def notion_pages(
             Defaults to None. If None, the function will generate all pages
             in the workspace that are accessible to the integration.
         api_key (str): The Notion API secret key.
+        max_connections (int): The size of the connection pool to the Notion API.
+        max_workers (int): The max number of concurrent block requests.
+        tracer (TRequestHook, optional): Called with a record of each request
+            sent to the Notion API. Defaults to None.
+        api_url (str): The base URL of the Notion API, e.g. of a local
+            stand-in for benchmarks.
 
     Yields:
-        Iterator[TDataItems]: Pages from Notion.
+        Iterator[TDataItems]: Blocks of each page, nested children are stored
+            under the `children` key of their parent block.
     """
-    client = NotionClient(api_key)
+    client = NotionClient(
+        api_key, api_url=api_url, max_connections=max_connections, tracer=tracer
+    )
     pages = client.search(filter_criteria={"value": "page", "property": "object"})
 
-    for page in pages:
-        blocks = client.fetch_resource("blocks", page["id"], "children")["results"]
-        if page_ids and page["id"] not in page_ids:
-            continue
-
+    # filter pages before requesting any of their blocks
+    wanted_ids = set(page_ids or [])
+    selected_ids = [
+        page["id"] for page in pages if not wanted_ids or page["id"] in wanted_ids
+    ]
+    # pages are yielded as soon as their blocks are fetched
+    for _, blocks in fetch_block_trees(client, selected_ids, max_workers=max_workers):
         if blocks:
             yield blocks
 
+    logger.info(f"Notion requests: {client.scheduler.stats}")
+
+
+def _query_pages(
+    notion_database: NotionDatabase,
+    schema_cache: SchemaCache,
+    projection: Optional[PageProjection] = None,
+    query_options: Optional[Dict[str, Any]] = None,
+    data_format: str = "object",
+    filter_criteria: Optional[Dict[str, Any]] = None,
+) -> Iterator[TDataItems]:
+    """
+    Queries the pages of a database and revalidates its cached schema.
+
+    Args:
+        notion_database (NotionDatabase): The database to query.
+        schema_cache (SchemaCache): The cached schemas of the databases.
+        projection (PageProjection, optional): The projection of the pages
+            into flat records. Defaults to None, which yields the pages as
+            returned by the API.
+        query_options (Dict[str, Any], optional): The `page_size`,
+            `batch_size` and `prefetch` options of `NotionDatabase.query`.
+            Defaults to None.
+        data_format (str): "arrow" to yield projected records as Arrow
+            tables, "object" to yield lists. Defaults to "object".
+        filter_criteria (Dict[str, Any], optional): A dictionary of filters
+            to apply to the pages. Defaults to None.
+
+    Yields:
+        Iterator[TDataItems]: Pages from the database.
+    """
+    database_id = notion_database.database_id
+    # the source state can only be written during extraction
+    schema_cache.store(database_id)
+
+    properties = None
+    filter_properties = None
+    if projection is not None:
+        properties = projection.properties
+        if properties is not None:
+            filter_properties = {"filter_properties": projection.property_ids}
+
+    for pages in notion_database.query(
+        filter_properties=filter_properties,
+        filter_criteria=filter_criteria,
+        **(query_options or {}),
+    ):
+        schema_changed = False
+        # databases neither flattened nor looked up by title are not cached
+        if (
+            pages
+            and database_id in schema_cache.entries
+            and not schema_cache.is_current(database_id, pages[0], properties)
+        ):
+            schema = schema_cache.refresh(database_id)
+            schema_cache.store(database_id)
+            if projection is not None:
+                projection = PageProjection(schema, properties)
+                schema_changed = True
+
+        if projection is None:
+            yield pages
+            continue
+
+        records: TDataItems = [projection.project(page) for page in pages]
+        if data_format == "arrow" and records:
+            records = projection.to_arrow(records)
+        if schema_changed:
+            records = dlt.mark.with_hints(
+                records, dlt.mark.make_hints(columns=projection.columns)
+            )
+        yield records
+
+
+def _query_database(
+    notion_database: NotionDatabase,
+    schema_cache: SchemaCache,
+    projection: Optional[PageProjection] = None,
+    query_options: Optional[Dict[str, Any]] = None,
+    data_format: str = "object",
+    reconcile: bool = False,
+    last_edited_time: dlt.sources.incremental[str] = dlt.sources.incremental(
+        "last_edited_time", on_cursor_value_missing="include"
+    ),
+) -> Iterator[TDataItems]:
+    """
+    Queries the pages of a database which were edited since the last run.
+
+    Args:
+        notion_database (NotionDatabase): The database to query.
+        schema_cache (SchemaCache): The cached schemas of the databases.
+        projection (PageProjection, optional): The projection of the pages
+            into flat records. Defaults to None.
+        query_options (Dict[str, Any], optional): The options of
+            `NotionDatabase.query`. Defaults to None.
+        data_format (str): The format of the projected records, "object" or
+            "arrow". Defaults to "object".
+        reconcile (bool): If True, the ids of all pages are listed after the
+            query and tombstones are yielded for the pages listed by the
+            previous run which are gone. Defaults to False.
+        last_edited_time (dlt.sources.incremental[str]): The highest
+            `last_edited_time` seen so far. On the first run there is no
+            value yet and the whole database is queried. Tombstones have no
+            `last_edited_time` and are always included.
+
+    Yields:
+        Iterator[TDataItems]: Pages from the database.
+    """
+    filter_criteria = None
+    if last_edited_time.last_value is not None:
+        # Notion rounds `last_edited_time` down to the minute, so pages edited
+        # in the same minute as the last run are queried again and
+        # deduplicated by dlt on the primary key
+        filter_criteria = {
+            "timestamp": "last_edited_time",
+            # a datetime for flattened records, a string for raw pages
+            "last_edited_time": {
+                "on_or_after": ensure_pendulum_datetime(
+                    last_edited_time.last_value
+                ).isoformat()
+            },
+        }
+    yield from _query_pages(
+        notion_database,
+        schema_cache,
+        projection,
+        query_options,
+        data_format,
+        filter_criteria,
+    )
+
+    if reconcile:
+        tombstones = _reconcile_page_ids(notion_database, query_options)
+        if tombstones and projection is not None and data_format == "arrow":
+            yield projection.to_arrow(tombstones)
+        elif tombstones:
+            yield tombstones
+
+
+def _reconcile_page_ids(
+    notion_database: NotionDatabase, query_options: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lists the ids of the pages of a database and returns tombstones for the
+    pages listed by the previous run which were since deleted, archived or
+    moved to the trash. The listed ids are kept in the source state.
+
+    Args:
+        notion_database (NotionDatabase): The database to list.
+        query_options (Dict[str, Any], optional): The options of
+            `NotionDatabase.query`, only `page_size` is used. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: Records with the `id` of the removed pages and
+            `is_deleted` set, to be merged over their rows.
+    """
+    page_size = (query_options or {}).get("page_size")
+    page_ids = set(notion_database.list_page_ids(page_size=page_size))
+
+    known_ids = dlt.current.source_state().setdefault(PAGE_IDS_KEY, {})
+    removed_ids = set(known_ids.get(notion_database.database_id, [])) - page_ids
+    known_ids[notion_database.database_id] = sorted(page_ids)
+
+    if removed_ids:
+        logger.info(
+            f"{len(removed_ids)} pages were removed from Notion database "
+            f"{notion_database.database_id}"
+        )
+    return [
+        {"id": page_id, "last_edited_time": None, "is_deleted": True}
+        for page_id in sorted(removed_ids)
+    ]
+
 
 @dlt.source
 def notion_databases(
-    database_ids: Optional[List[Dict[str, str]]] = None,
+    database_ids: Optional[List[Dict[str, Any]]] = None,
     api_key: str = dlt.secrets.value,
+    incremental: bool = False,
+    flatten: bool = False,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    batch_size: Optional[int] = None,
+    prefetch: bool = False,
+    data_format: str = "object",
+    reconcile: bool = False,
+    tracer: Optional[TRequestHook] = None,
+    api_url: str = API_URL,
+    parallelized: bool = True,
 ) -> Iterator[DltResource]:
     """
     Retrieves data from Notion databases.
 
+    The title and property definitions of the databases are cached in the
+    source state and revalidated against the loaded pages, so they are only
+    fetched again when they changed. Restore the state from the destination
+    with `pipeline.sync_destination()` before creating the source to use the
+    cache on a fresh working directory.
+
     Args:
-        database_ids (List[Dict[str, str]], optional): A list of dictionaries
-            each containing a database id and a name.
+        database_ids (List[Dict[str, Any]], optional): A list of dictionaries
+            each containing a database id, a name and, when flattening, the
+            names of the `properties` to load.
             Defaults to None. If None, the function will generate all databases
             in the workspace that are accessible to the integration.
         api_key (str): The Notion API secret key.
+        incremental (bool): If True, only pages edited since the last run are
+            queried and merged on `id`. Requires a destination supporting
+            merge, e.g. the filesystem destination with the `delta` table
+            format. Defaults to False, which replaces the whole table.
+        flatten (bool): If True, pages are projected into flat records with
+            one column per property, typed by the database schema, instead of
+            the nested page objects. Only the listed `properties` of each
+            database are requested and loaded, all of them if not listed.
+            Defaults to False.
+        max_connections (int): The size of the connection pool to the Notion API.
+        requests_per_second (float): The request budget shared by all databases.
+        max_concurrency (int): The max number of requests in flight, halved
+            when throttled by the API and grown back on healthy responses.
+        page_size (int): The number of pages per query request, at most 100.
+        batch_size (int, optional): The number of pages per extracted batch,
+            bounding the memory held by each one. Defaults to None, one batch
+            per query request.
+        prefetch (bool): If True, the next query request is sent in the
+            background while the current batch is extracted, overlapping the
+            latency of the API with the processing of the pages. Defaults to
+            False.
+        data_format (str): "arrow" to yield the flattened records as Arrow
+            tables, which dlt does not normalize row by row. Requires
+            `flatten`. Defaults to "object".
+        reconcile (bool): If True, incremental loads list the ids of all pages
+            of each database, requesting no property but the title, and yield
+            tombstones with `is_deleted` set for the pages deleted, archived
+            or moved to the trash since the previous run. Defaults to False.
+        tracer (TRequestHook, optional): Called with a record of each request
+            sent to the Notion API, e.g. a `RequestStats` summarizing the run.
+            Defaults to None.
+        api_url (str): The base URL of the Notion API, e.g. of a local
+            stand-in for benchmarks.
+        parallelized (bool): If True, the databases are queried concurrently,
+            each one still loaded as its own resource. The number of databases
+            queried at once is bounded by the dlt `extract.workers` setting.
+            Defaults to True.
 
     Yields:
         DltResource: Data resources from Notion databases.
     """
-    notion_client = NotionClient(api_key)
+    notion_client = NotionClient(
+        api_key,
+        api_url=api_url,
+        max_connections=max_connections,
+        requests_per_second=requests_per_second,
+        max_concurrency=max_concurrency,
+        tracer=tracer,
+    )
+
+    if data_format == "arrow" and not flatten:
+        raise ValueError("Arrow tables can only be yielded for flattened records")
+    query_options = {
+        "page_size": page_size,
+        "batch_size": batch_size,
+        "prefetch": prefetch,
+    }
+
+    # read only here, entries are written back by the resources
+    schema_cache = SchemaCache(
+        notion_client, dlt.current.source_state().get(SCHEMA_CACHE_KEY, {})
+    )
 
     if database_ids is None:
         search_results = notion_client.search(
             filter_criteria={"value": "database", "property": "object"}
         )
-        database_ids = [
-            {"id": result["id"], "use_name": result["title"][0]["plain_text"]}
-            for result in search_results
-        ]
+        database_ids = []
+        for result in search_results:
+            # search results already hold the schema of each database
+            schema = schema_cache.update(result["id"], result)
+            database_ids.append({"id": result["id"], "use_name": schema["title"]})
 
     for database in database_ids:
         if "use_name" not in database:
-            # Fetch the database details from Notion
-            details = notion_client.get_database(database["id"])
+            # Fetch the database details from Notion unless cached
+            database["use_name"] = schema_cache.get(database["id"])["title"]
 
-            # Extract the name/title from the details
-            database["use_name"] = details["title"][0]["plain_text"]
+        projection = None
+        if flatten:
+            projection = PageProjection(
+                schema_cache.get(database["id"]), database.get("properties")
+            )
 
         notion_database = NotionDatabase(database["id"], notion_client)
-        yield dlt.resource(  # type: ignore
-            notion_database.query(),
-            primary_key="id",
-            name=database["use_name"],
-            write_disposition="replace",
-        )
+        if incremental:
+            yield dlt.resource(
+                _query_database,
+                primary_key="id",
+                name=database["use_name"],
+                write_disposition={"disposition": "merge", "strategy": "upsert"},
+                columns=projection.columns if projection is not None else None,
+                parallelized=parallelized,
+            )(
+                notion_database,
+                schema_cache,
+                projection,
+                query_options,
+                data_format,
+                reconcile,
+            )
+        else:
+            yield dlt.resource(
+                _query_pages,
+                primary_key="id",
+                name=database["use_name"],
+                write_disposition="replace",
+                columns=projection.columns if projection is not None else None,
+                parallelized=parallelized,
+            )(notion_database, schema_cache, projection, query_options, data_format)
@@ -0,0 +1,71 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterator, List, Sequence, Tuple
+
+from .client import NotionClient
+
+# blocks whose children are pages or databases on their own
+# and are not loaded as part of the parent page
+NESTED_OBJECT_TYPES = ("child_page", "child_database")
+
+
+def fetch_block_trees(
+    notion_client: NotionClient, page_ids: Sequence[str], max_workers: int
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Fetches the blocks of several pages, including nested children.
+
+    Blocks are fetched concurrently across pages and depths, and each page is
+    yielded as soon as its whole tree is fetched, so pages are yielded in the
+    order they complete. At most `max_workers` pages are walked at once, so
+    that only their trees are held in memory. Children of a block are stored
+    under its `children` key.
+
+    Args:
+        notion_client (NotionClient): A client to interact with the Notion API.
+        page_ids (Sequence[str]): The ids of the pages to fetch.
+        max_workers (int): The max number of concurrent requests.
+
+    Yields:
+        Tuple[str, List[Dict[str, Any]]]: The id and the top level blocks of
+            each page.
+    """
+    waiting_ids: Deque[str] = deque(page_ids)
+    trees: Dict[str, List[Dict[str, Any]]] = {}
+    # number of block children requests not answered yet, by page
+    unanswered: Dict[str, int] = {}
+    # requests in flight -> page id and the list receiving the children
+    requests: Dict[Future, Tuple[str, List[Dict[str, Any]]]] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def request_children(
+            page_id: str, block_id: str, children: List[Dict[str, Any]]
+        ) -> None:
+            future = executor.submit(
+                lambda: list(notion_client.fetch_block_children(block_id))
+            )
+            requests[future] = (page_id, children)
+            unanswered[page_id] += 1
+
+        while waiting_ids or requests:
+            while waiting_ids and len(trees) < max_workers:
+                page_id = waiting_ids.popleft()
+                trees[page_id] = []
+                unanswered[page_id] = 0
+                request_children(page_id, page_id, trees[page_id])
+
+            answered, _ = wait(requests, return_when=FIRST_COMPLETED)
+            for future in answered:
+                page_id, children = requests.pop(future)
+                blocks = future.result()
+                children.extend(blocks)
+                for block in blocks:
+                    if block.get("has_children") and (
+                        block.get("type") not in NESTED_OBJECT_TYPES
+                    ):
+                        block["children"] = []
+                        request_children(page_id, block["id"], block["children"])
+                unanswered[page_id] -= 1
+                if not unanswered[page_id]:
+                    del unanswered[page_id]
+                    yield page_id, trees.pop(page_id)
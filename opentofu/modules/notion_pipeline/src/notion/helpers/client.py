@@ -1,19 +1,61 @@
-from typing import Any, Dict, Iterator, Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from dlt.sources.helpers import requests
+from dlt.sources.helpers.requests import Client, Response
 
-from ..settings import API_URL
+from ..settings import (
+    API_URL,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_REQUESTS_PER_SECOND,
+)
+from .scheduler import RequestScheduler
+from .tracing import RequestRecord, TRequestHook
 
 
 class NotionClient:
     """A client to interact with the Notion API.
 
+    All requests go through a persistent session, so connections to the API
+    are kept alive and reused across calls instead of paying for a new TLS
+    handshake on every page. The client may be shared by several threads,
+    requests from all of them go through a single scheduler enforcing the
+    rate limits of the API and retrying throttled or failed requests.
+
     Attributes:
         api_key (str): The Notion API secret key.
+        api_url (str): The base URL of the Notion API.
+        http (Client): The HTTP client holding the pooled sessions.
+        scheduler (RequestScheduler): The scheduler shared by all requests.
+        tracer (TRequestHook, optional): Called with a RequestRecord after
+            each request, e.g. a RequestStats collecting them.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: str = API_URL,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        tracer: Optional[TRequestHook] = None,
+    ):
         self.api_key = api_key
+        self.api_url = api_url
+        # sessions are per thread but share a single connection pool,
+        # retries are left to the scheduler so that they are rate limited
+        self.http = Client(
+            max_connections=max_connections,
+            raise_for_status=False,
+            status_codes=(),
+            exceptions=(),
+        )
+        self.scheduler = RequestScheduler(
+            requests_per_second, max_concurrency, max_attempts=max_attempts
+        )
+        self.tracer = tracer
 
     def _create_headers(self) -> Dict[str, str]:
         headers = {
@@ -39,13 +81,73 @@ class NotionClient:
         Returns:
             str: The endpoint for the resource.
         """
-        url = f"{API_URL}/{resource}/{resource_id}"
+        url = f"{self.api_url}/{resource}/{resource_id}"
         if subresource:
             url += f"/{subresource}"
         return url
 
+    def _request(
+        self,
+        method: str,
+        resource: str,
+        resource_id: str,
+        subresource: Optional[str] = None,
+        cursor_depth: int = 0,
+        **kwargs: Any,
+    ) -> Response:
+        url = self.get_endpoint(resource, resource_id, subresource)
+        if self.tracer is None:
+            return self.scheduler.execute(
+                lambda: self.http.session.request(method, url, **kwargs)
+            )
+
+        # latency and status of each attempt
+        attempts: List[Tuple[float, Optional[int]]] = []
+
+        def send() -> Response:
+            started_at = time.perf_counter()
+            try:
+                response = self.http.session.request(method, url, **kwargs)
+            except Exception:
+                attempts.append((time.perf_counter() - started_at, None))
+                raise
+            attempts.append((time.perf_counter() - started_at, response.status_code))
+            return response
+
+        started_at = time.perf_counter()
+        response = None
+        try:
+            response = self.scheduler.execute(send)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started_at
+            endpoint = "/".join(
+                part
+                for part in (resource, "{id}" if resource_id else "", subresource)
+                if part
+            )
+            latency = attempts[-1][0] if attempts else 0.0
+            self.tracer(
+                RequestRecord(
+                    method=method,
+                    endpoint=endpoint,
+                    status=response.status_code if response is not None else None,
+                    bytes=len(response.content) if response is not None else 0,
+                    latency=latency,
+                    wait_time=max(0.0, elapsed - sum(t for t, _ in attempts)),
+                    retries=max(0, len(attempts) - 1),
+                    throttles=sum(1 for _, status in attempts if status == 429),
+                    cursor_depth=cursor_depth,
+                )
+            )
+
     def fetch_resource(
-        self, resource: str, resource_id: str, subresource: Optional[str] = None
+        self,
+        resource: str,
+        resource_id: str,
+        subresource: Optional[str] = None,
+        query_params: Optional[Dict[str, Any]] = None,
+        cursor_depth: int = 0,
     ) -> Any:
         """Fetches a resource from the Notion API.
 
@@ -53,13 +155,23 @@ class NotionClient:
             resource (str): The resource to fetch.
             resource_id (str): The id of the resource.
             subresource (str, optional): The subresource to fetch. Defaults to None.
+            query_params (Dict[str, Any], optional): The query parameters to send
+                with the request. Defaults to None.
+            cursor_depth (int): The number of pages fetched before this one
+                when following a pagination cursor, for tracing. Defaults to 0.
 
         Returns:
             Any: The resource from the Notion API.
         """
-        url = self.get_endpoint(resource, resource_id, subresource)
-        headers = self._create_headers()
-        response = requests.get(url, headers=headers)
+        response = self._request(
+            "GET",
+            resource,
+            resource_id,
+            subresource,
+            cursor_depth,
+            headers=self._create_headers(),
+            params=query_params,
+        )
         response.raise_for_status()
         return response.json()
 
@@ -70,6 +182,7 @@ class NotionClient:
         subresource: Optional[str] = None,
         query_params: Optional[Dict[str, Any]] = None,
         payload: Optional[Dict[str, Any]] = None,
+        cursor_depth: int = 0,
     ) -> Any:
         """Sends a payload to the Notion API using the POST method.
 
@@ -81,15 +194,17 @@ class NotionClient:
             query_params (Dict[str, Any], optional): The query parameters to send
                 with the payload. Defaults to None.
             payload (Dict[str, Any], optional): The payload to send. Defaults to None.
+            cursor_depth (int): The number of pages fetched before this one
+                when following a pagination cursor, for tracing. Defaults to 0.
 
         Returns:
             Any: The response from the Notion API.
 
         Raises:
-            requests.HTTPError: If the response from the Notion API is not 200.
+            HTTPError: If the response from the Notion API is not 200 after
+                all attempts.
         """
 
-        url = self.get_endpoint(resource, resource_id, subresource)
         headers = self._create_headers()
 
         if payload is None:
@@ -97,8 +212,15 @@ class NotionClient:
 
         filtered_payload = self._filter_out_none_values(payload)
 
-        response = requests.post(
-            url, headers=headers, params=query_params, json=filtered_payload
+        response = self._request(
+            "POST",
+            resource,
+            resource_id,
+            subresource,
+            cursor_depth,
+            headers=headers,
+            params=query_params,
+            json=filtered_payload,
         )
         response.raise_for_status()
         return response.json()
@@ -131,6 +253,7 @@ class NotionClient:
             Dict[str, Any]: A result from the search.
         """
         has_more = True
+        cursor_depth = 0
 
         while has_more:
             payload = {
@@ -143,7 +266,10 @@ class NotionClient:
 
             filtered_payload = self._filter_out_none_values(payload)
 
-            response = self.send_payload("search", "", payload=filtered_payload)
+            response = self.send_payload(
+                "search", "", payload=filtered_payload, cursor_depth=cursor_depth
+            )
+            cursor_depth += 1
 
             for result in response.get("results", []):
                 yield result
@@ -152,6 +278,43 @@ class NotionClient:
             has_more = next_cursor is not None
             start_cursor = next_cursor
 
+    def fetch_block_children(
+        self, block_id: str, page_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Fetches the direct children of a block or a page, following the
+        pagination cursor.
+
+        Notion API Reference. Retrieve block children:
+            https://developers.notion.com/reference/get-block-children
+
+        Args:
+            block_id (str): The id of the block or page.
+            page_size (int, optional): The number of children per request.
+                Defaults to None.
+
+        Yields:
+            Dict[str, Any]: A child block.
+        """
+        start_cursor = None
+        cursor_depth = 0
+
+        while True:
+            query_params = {"start_cursor": start_cursor, "page_size": page_size}
+            response = self.fetch_resource(
+                "blocks",
+                block_id,
+                "children",
+                query_params=self._filter_out_none_values(query_params),
+                cursor_depth=cursor_depth,
+            )
+            cursor_depth += 1
+
+            yield from response.get("results", [])
+
+            start_cursor = response.get("next_cursor")
+            if not response.get("has_more") or start_cursor is None:
+                break
+
     def get_database(self, database_id: str) -> Any:
         """Fetches the details of a specific database by its ID.
 
@@ -1,9 +1,13 @@
-from typing import Any, Dict, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from dlt.common.typing import TDataItem
 
 from .client import NotionClient
 
+# the id of the title property, the same in all databases
+TITLE_PROPERTY_ID = "title"
+
 
 class NotionDatabase:
     """
@@ -36,9 +40,15 @@ class NotionDatabase:
         sorts: Optional[Dict[str, Any]] = None,
         start_cursor: Optional[str] = None,
         page_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        prefetch: bool = False,
     ) -> Iterable[TDataItem]:
         """Queries the database for records.
 
+        Records are yielded in lists, one per response unless `batch_size`
+        is set. With `prefetch`, the next response is requested in the
+        background while the records of the current one are processed.
+
         Notion API Reference. Query a database:
             https://developers.notion.com/reference/post-database-query
 
@@ -53,10 +63,53 @@ class NotionDatabase:
                 Defaults to None.
             page_size (int, optional): The number of records to return.
                 Defaults to None.
+            batch_size (int, optional): The number of records per yielded
+                list, regardless of the page size. Defaults to None.
+            prefetch (bool): If True, the next page is requested before the
+                current one is consumed. Defaults to False.
 
         Yields:
             List[Dict[str, Any]]: A record from the database.
         """
+        responses = self._query_responses(
+            filter_properties, filter_criteria, sorts, start_cursor, page_size
+        )
+        if prefetch:
+            responses = _prefetched(responses)
+        batches = (response.get("results", []) for response in responses)
+        if batch_size:
+            batches = _rebatched(batches, batch_size)
+        yield from batches
+
+    def list_page_ids(self, page_size: Optional[int] = None) -> Iterator[str]:
+        """Lists the ids of all pages of the database.
+
+        Notion cannot leave out every property, so only the title, which every
+        database has, is requested along with the page ids.
+
+        Args:
+            page_size (int, optional): The number of pages per request.
+                Defaults to None.
+
+        Yields:
+            str: The id of a page. Archived and trashed pages are not listed.
+        """
+        for pages in self.query(
+            filter_properties={"filter_properties": [TITLE_PROPERTY_ID]},
+            page_size=page_size,
+        ):
+            for page in pages:
+                yield page["id"]
+
+    def _query_responses(
+        self,
+        filter_properties: Optional[Dict[str, Any]],
+        filter_criteria: Optional[Dict[str, Any]],
+        sorts: Optional[Dict[str, Any]],
+        start_cursor: Optional[str],
+        page_size: Optional[int],
+    ) -> Iterator[Dict[str, Any]]:
+        cursor_depth = 0
         while True:
             payload = {
                 "filter": filter_criteria,
@@ -70,9 +123,43 @@ class NotionDatabase:
                 subresource="query",
                 query_params=filter_properties,
                 payload=payload,
+                cursor_depth=cursor_depth,
             )
+            cursor_depth += 1
 
-            yield response.get("results", [])
+            yield response
             if not response.get("has_more"):
                 break
             start_cursor = response.get("next_cursor")
+
+
+def _prefetched(responses: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Requests the next response in a background thread while the current
+    one is consumed, so that at most one response is held ahead."""
+
+    def fetch_next() -> Optional[Dict[str, Any]]:
+        return next(responses, None)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        upcoming = executor.submit(fetch_next)
+        while True:
+            response = upcoming.result()
+            if response is None:
+                return
+            upcoming = executor.submit(fetch_next)
+            yield response
+
+
+def _rebatched(
+    batches: Iterable[List[TDataItem]], batch_size: int
+) -> Iterator[List[TDataItem]]:
+    """Splits and merges lists of records into lists of `batch_size` records,
+    the last one possibly shorter."""
+    batch: List[TDataItem] = []
+    for records in batches:
+        batch.extend(records)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
@@ -0,0 +1,191 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from dlt.common.data_types import TDataType
+from dlt.common.destination import DestinationCapabilitiesContext
+from dlt.common.normalizers.naming.snake_case import NamingConvention
+from dlt.common.schema.typing import TColumnSchema, TTableSchemaColumns
+from dlt.common.time import ensure_pendulum_date, ensure_pendulum_datetime
+from dlt.common.typing import TDataItem
+
+# page attributes kept next to the projected properties, `id` and
+# `last_edited_time` are needed to merge and load incrementally
+PAGE_ATTRIBUTES: Dict[str, TColumnSchema] = {
+    "id": {"data_type": "text", "nullable": False},
+    "created_time": {"data_type": "timestamp"},
+    "last_edited_time": {"data_type": "timestamp"},
+    "archived": {"data_type": "bool"},
+    "in_trash": {"data_type": "bool"},
+    "url": {"data_type": "text"},
+    # set on tombstones of pages removed from the database
+    "is_deleted": {"data_type": "bool"},
+}
+# page attributes parsed into datetimes, also in `object` format so that the
+# incremental cursor has the same type as in Arrow tables
+TIMESTAMP_ATTRIBUTES = ("created_time", "last_edited_time")
+
+
+def _plain_text(value: List[Dict[str, Any]]) -> Optional[str]:
+    return "".join(text["plain_text"] for text in value) if value else None
+
+
+def _name(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    return value["name"] if value else None
+
+
+def _names(value: List[Dict[str, Any]]) -> List[str]:
+    return [item["name"] for item in value]
+
+
+def _ids(value: List[Dict[str, Any]]) -> List[str]:
+    return [item["id"] for item in value]
+
+
+def _date(value: Optional[Dict[str, Any]]) -> Any:
+    return ensure_pendulum_date(value["start"]) if value else None
+
+
+def _timestamp(value: Optional[str]) -> Any:
+    return ensure_pendulum_datetime(value) if value else None
+
+
+def _typed(value: Optional[Dict[str, Any]]) -> Any:
+    # formulas and rollups hold their result under their own type
+    return value.get(value["type"]) if value else None
+
+
+def _unique_id(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not value or value["number"] is None:
+        return None
+    prefix = value.get("prefix")
+    return f"{prefix}-{value['number']}" if prefix else str(value["number"])
+
+
+TParser = Optional[Callable[[Any], Any]]
+
+# data types of the columns cast when converting records to Arrow, json
+# columns keep the nested type inferred by Arrow
+ARROW_CAST_TYPES = ("text", "double", "bool", "date", "timestamp")
+
+# property type -> (value parser, dlt data type), the data type of formulas
+# and rollups depends on their expression and is left to dlt to infer
+PROPERTY_TYPES: Dict[str, Tuple[TParser, Optional[TDataType]]] = {
+    "title": (_plain_text, "text"),
+    "rich_text": (_plain_text, "text"),
+    "number": (None, "double"),
+    "select": (_name, "text"),
+    "status": (_name, "text"),
+    "multi_select": (_names, "json"),
+    "date": (_date, "date"),
+    "checkbox": (None, "bool"),
+    "url": (None, "text"),
+    "email": (None, "text"),
+    "phone_number": (None, "text"),
+    "created_time": (_timestamp, "timestamp"),
+    "last_edited_time": (_timestamp, "timestamp"),
+    "people": (_ids, "json"),
+    "relation": (_ids, "json"),
+    "files": (_names, "json"),
+    "unique_id": (_unique_id, "text"),
+    "formula": (_typed, None),
+    "rollup": (_typed, None),
+}
+
+
+class PageProjection:
+    """Projects Notion pages into flat records typed by their database schema.
+
+    Each property becomes a single column named after the normalized property
+    name and holding its plain value: the text of titles and rich texts, the
+    name of selects, the start date of dates and so on. Nested objects are
+    dropped, so no child tables are created.
+
+    Args:
+        database_structure (Dict[str, Any]): The database object returned by
+            the Notion API or its cached schema, holding the `id` and `type`
+            of each property.
+        properties (List[str], optional): The names of the properties to
+            project. Defaults to None, which projects all properties.
+
+    Attributes:
+        properties (List[str], optional): The names of the projected
+            properties, None for all of them.
+        columns (TTableSchemaColumns): The dlt column hints of the records.
+        property_ids (List[str]): The ids of the projected properties, to be
+            sent as `filter_properties` when querying the database.
+    """
+
+    def __init__(
+        self,
+        database_structure: Dict[str, Any],
+        properties: Optional[List[str]] = None,
+    ):
+        self.properties = properties
+        naming = NamingConvention()
+        self.columns: TTableSchemaColumns = {
+            name: {"name": name, **hints} for name, hints in PAGE_ATTRIBUTES.items()
+        }
+        self.property_ids: List[str] = []
+        self._parsers: Dict[str, Tuple[str, str, TParser]] = {}
+
+        for name, schema in database_structure["properties"].items():
+            if properties is not None and name not in properties:
+                continue
+            column_name = naming.normalize_identifier(name)
+            if column_name in PAGE_ATTRIBUTES:
+                # e.g. a unique id property named "ID" must not shadow `id`
+                column_name = f"{column_name}_property"
+            parser, data_type = PROPERTY_TYPES.get(schema["type"], (None, "json"))
+            column: TColumnSchema = {"name": column_name}
+            if data_type:
+                column["data_type"] = data_type
+            self.columns[column_name] = column
+            # ids come url encoded and are encoded again in the query string
+            self.property_ids.append(unquote(schema["id"]))
+            self._parsers[name] = (column_name, schema["type"], parser)
+
+    def project(self, page: TDataItem) -> TDataItem:
+        """Turns a Notion page into a flat record.
+
+        Args:
+            page (TDataItem): A page returned by the Notion API.
+
+        Returns:
+            TDataItem: The record holding the page attributes and the
+                projected properties.
+        """
+        record = {name: page.get(name) for name in PAGE_ATTRIBUTES}
+        for name in TIMESTAMP_ATTRIBUTES:
+            record[name] = _timestamp(record[name])
+        record["is_deleted"] = bool(record["archived"] or record["in_trash"])
+        properties = page["properties"]
+        for name, (column_name, property_type, parser) in self._parsers.items():
+            value = properties[name][property_type] if name in properties else None
+            record[column_name] = parser(value) if parser else value
+        return record
+
+    def to_arrow(self, records: List[TDataItem]) -> Any:
+        """Converts projected records into an Arrow table typed by the column
+        hints, so that dlt does not have to normalize them row by row.
+
+        Args:
+            records (List[TDataItem]): Records returned by `project`.
+
+        Returns:
+            pyarrow.Table: The records as an Arrow table.
+        """
+        from dlt.common.libs.pyarrow import get_py_arrow_datatype, pyarrow
+
+        table = pyarrow.Table.from_pylist(records)
+        caps = DestinationCapabilitiesContext.generic_capabilities()
+        for idx, field in enumerate(table.schema):
+            column = self.columns.get(field.name, {})
+            if column.get("data_type") not in ARROW_CAST_TYPES:
+                continue
+            # e.g. columns holding only nulls have no type
+            arrow_type = get_py_arrow_datatype(column, caps, "UTC")
+            if field.type != arrow_type:
+                table = table.set_column(
+                    idx, field.name, table.column(idx).cast(arrow_type)
+                )
+        return table
@@ -0,0 +1,50 @@
+"""A token bucket limiting the rate of API requests.
+
+Both pipelines deploy their own copy of this module: the canonical copy is
+`notion_pipeline/src/notion/helpers/rate_limiter.py`, and the
+`check-shared-modules-sync` pre-commit hook fails unless the copy in
+`gsheets_pipeline/src/google_sheets/helpers` is identical.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """A thread safe token bucket limiting the rate of requests.
+
+    Tokens are added continuously at `rate` per second, up to `capacity`.
+    Every request takes one token and waits until one is available, so the
+    rate holds across all threads sharing the bucket.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, waiting until one is available.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            # take the token now, a negative balance reserves the next ones
+            # for the threads already waiting
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
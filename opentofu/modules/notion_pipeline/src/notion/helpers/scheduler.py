@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+from dlt.sources.helpers.requests import ConnectionError, Response, Timeout
+
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# status codes worth retrying besides 429 which is handled separately
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class RequestScheduler:
+    """Schedules requests to the Notion API within its rate limits.
+
+    Every request takes a token from a token bucket refilled at
+    `requests_per_second` and needs one of `concurrency` slots. Throttled
+    responses (429) pause all requests for the `Retry-After` delay and halve
+    the concurrency, which then grows back by one slot after each run of
+    healthy responses. Server errors and connection failures are retried with
+    exponential backoff.
+
+    Attributes:
+        max_concurrency (int): The max number of requests in flight.
+        concurrency (int): The current number of requests allowed in flight.
+        max_attempts (int): The max number of attempts for a single request.
+        backoff_factor (float): The base delay of the exponential backoff.
+        max_retry_delay (float): The max delay between two attempts.
+        requests (int): The number of requests executed, each counted once
+            however many times it was attempted.
+        attempts (int): The number of attempts sent, retries included.
+        throttles (int): The number of throttled responses.
+        retries (int): The number of retried requests.
+        wait_time (float): The seconds spent waiting for tokens, slots and
+            retry delays.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        max_concurrency: int,
+        max_attempts: int = 5,
+        backoff_factor: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ):
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_retry_delay = max_retry_delay
+        self.requests = 0
+        self.attempts = 0
+        self.throttles = 0
+        self.retries = 0
+        self.wait_time = 0.0
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._resume_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Returns the counters of the scheduler."""
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "throttles": self.throttles,
+                "retries": self.retries,
+                "wait_time": round(self.wait_time, 3),
+                "concurrency": self.concurrency,
+            }
+
+    def execute(self, send: Callable[[], Response]) -> Response:
+        """Sends a request once it is allowed to, retrying throttled and
+        failed attempts.
+
+        Args:
+            send (Callable[[], Response]): Sends the request.
+
+        Returns:
+            Response: The last response, which may still be an error once
+                all attempts are used.
+        """
+        with self._condition:
+            self.requests += 1
+        attempt = 1
+        while True:
+            self._acquire()
+            try:
+                response = send()
+            except (ConnectionError, Timeout):
+                self._release()
+                if attempt >= self.max_attempts:
+                    raise
+                self._retry(attempt)
+                attempt += 1
+                continue
+            self._release()
+
+            if response.status_code == 429:
+                self._throttled(response)
+            elif response.status_code not in RETRY_STATUS_CODES:
+                self._healthy()
+                return response
+
+            if attempt >= self.max_attempts:
+                return response
+            # throttled requests wait for the pause in `_acquire` instead
+            self._retry(attempt, backoff=response.status_code != 429)
+            attempt += 1
+
+    def _acquire(self) -> None:
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                pause = self._resume_at - time.monotonic()
+                if pause <= 0 and self._in_flight < self.concurrency:
+                    break
+                self._condition.wait(timeout=pause if pause > 0 else None)
+            self._in_flight += 1
+            self.attempts += 1
+        self.rate_limiter.acquire()
+        with self._condition:
+            self.wait_time += time.monotonic() - started
+
+    def _release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _throttled(self, response: Response) -> None:
+        header_delay = _parse_retry_after(response.headers.get("Retry-After"))
+        with self._condition:
+            self.throttles += 1
+            retry_after = (
+                self._backoff_delay(self.throttles)
+                if header_delay is None
+                else header_delay
+            )
+            self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+            self.concurrency = max(1, self.concurrency // 2)
+            self._healthy_streak = 0
+            concurrency = self.concurrency
+        logger.warning(
+            f"Throttled by the Notion API, pausing requests for {retry_after}s "
+            f"with concurrency {concurrency}"
+        )
+
+    def _healthy(self) -> None:
+        with self._condition:
+            self._healthy_streak += 1
+            if (
+                self.concurrency < self.max_concurrency
+                and self._healthy_streak >= self.concurrency
+            ):
+                self.concurrency += 1
+                self._healthy_streak = 0
+                self._condition.notify_all()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return min(self.backoff_factor * 2 ** (attempt - 1), self.max_retry_delay)
+
+    def _retry(self, attempt: int, backoff: bool = True) -> None:
+        delay = self._backoff_delay(attempt) if backoff else 0.0
+        with self._condition:
+            self.retries += 1
+            self.wait_time += delay
+        time.sleep(delay)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses the `Retry-After` header, sent by Notion in seconds."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,137 @@
+import logging
+import threading
+from typing import Any, Collection, Dict, Mapping, Optional, Set
+
+import dlt
+from dlt.common.typing import TDataItem
+
+from .client import NotionClient
+
+logger = logging.getLogger(__name__)
+
+# key of the cache in the source state
+STATE_KEY = "database_schemas"
+
+
+class SchemaCache:
+    """Caches the title and property definitions of Notion databases in the
+    source state, so that runs do not fetch them from the API again.
+
+    Entries are revalidated against the pages loaded in the run: pages hold
+    the name and type of each of their properties, so a renamed, added,
+    removed or retyped property shows up without any metadata call and only
+    then is the database fetched again.
+
+    The source state is read only in the source function, entries fetched in
+    the source function are written back by `store` which has to run during
+    extraction, i.e. from a resource.
+
+    Attributes:
+        notion_client (NotionClient): A client to interact with the Notion API.
+        entries (Dict[str, Dict[str, Any]]): The cached schema of each
+            database, by database id.
+    """
+
+    def __init__(self, notion_client: NotionClient, entries: Mapping[str, Any]):
+        self.notion_client = notion_client
+        self.entries: Dict[str, Dict[str, Any]] = {
+            database_id: dict(entry) for database_id, entry in entries.items()
+        }
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, database_id: str) -> Dict[str, Any]:
+        """Returns the schema of a database, fetched if not cached yet.
+
+        Args:
+            database_id (str): The id of the database.
+
+        Returns:
+            Dict[str, Any]: The `title` of the database and the `id` and
+                `type` of its `properties`, by property name.
+        """
+        entry = self.entries.get(database_id)
+        if entry is None:
+            entry = self.refresh(database_id)
+        return entry
+
+    def refresh(self, database_id: str) -> Dict[str, Any]:
+        """Fetches the schema of a database from the Notion API.
+
+        Args:
+            database_id (str): The id of the database.
+
+        Returns:
+            Dict[str, Any]: The schema of the database.
+        """
+        logger.info(f"Fetching the schema of Notion database {database_id}")
+        return self.update(database_id, self.notion_client.get_database(database_id))
+
+    def update(self, database_id: str, structure: Dict[str, Any]) -> Dict[str, Any]:
+        """Caches the schema of a database from its structure.
+
+        Args:
+            database_id (str): The id of the database.
+            structure (Dict[str, Any]): The database object returned by the
+                Notion API.
+
+        Returns:
+            Dict[str, Any]: The schema of the database.
+        """
+        entry = {
+            "title": structure["title"][0]["plain_text"],
+            "properties": {
+                name: {"id": schema["id"], "type": schema["type"]}
+                for name, schema in structure["properties"].items()
+            },
+        }
+        with self._lock:
+            if self.entries.get(database_id) != entry:
+                self.entries[database_id] = entry
+                self._changed.add(database_id)
+        return entry
+
+    def is_current(
+        self,
+        database_id: str,
+        page: TDataItem,
+        properties: Optional[Collection[str]] = None,
+    ) -> bool:
+        """Tells whether the properties of a page match the cached schema.
+
+        Args:
+            database_id (str): The id of the database of the page.
+            page (TDataItem): A page returned by the Notion API.
+            properties (Collection[str], optional): The names of the
+                properties the page was filtered on. Defaults to None, for
+                pages holding all properties.
+
+        Returns:
+            bool: False if a property of the page is unknown or has another
+                type, or if a cached property is missing from the page.
+        """
+        cached = self.entries[database_id]["properties"]
+        expected = (
+            list(cached)
+            if properties is None
+            else [name for name in properties if name in cached]
+        )
+        values = page["properties"]
+        return len(values) == len(expected) and all(
+            name in values and values[name]["type"] == cached[name]["type"]
+            for name in expected
+        )
+
+    def store(self, database_id: str) -> None:
+        """Writes the schema of a database to the source state if it changed
+        during the run.
+
+        Args:
+            database_id (str): The id of the database.
+        """
+        with self._lock:
+            if database_id not in self._changed:
+                return
+            self._changed.discard(database_id)
+            entry = self.entries[database_id]
+        dlt.current.source_state().setdefault(STATE_KEY, {})[database_id] = entry
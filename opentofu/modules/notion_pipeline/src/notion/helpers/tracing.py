@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from fsspec import AbstractFileSystem
+from fsspec.implementations.local import LocalFileSystem
+
+logger = logging.getLogger(__name__)
+
+# name of the summary file written when none is given
+SUMMARY_FILE_NAME = "notion_requests.json"
+
+
+class RequestRecord(NamedTuple):
+    """A request sent to the Notion API, including its retries.
+
+    Attributes:
+        method (str): The HTTP method.
+        endpoint (str): The endpoint, with ids replaced by `{id}`.
+        status (int, optional): The status of the last attempt, None if it
+            failed to connect.
+        bytes (int): The size of the last response body.
+        latency (float): The seconds taken by the last attempt.
+        wait_time (float): The seconds spent waiting for the rate limit, for
+            a free slot and between attempts.
+        retries (int): The number of attempts after the first one.
+        throttles (int): The number of attempts throttled by the API.
+        cursor_depth (int): The number of pages requested before this one
+            when following a pagination cursor, 0 for the first page.
+    """
+
+    method: str
+    endpoint: str
+    status: Optional[int]
+    bytes: int
+    latency: float
+    wait_time: float
+    retries: int
+    throttles: int
+    cursor_depth: int
+
+
+TRequestHook = Callable[[RequestRecord], None]
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+class RequestStats:
+    """Collects the requests sent by a NotionClient and summarizes them.
+
+    Pass an instance as the `tracer` of a client, or of a source, to record
+    every request of a run.
+
+    Attributes:
+        records (List[RequestRecord]): The recorded requests.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[RequestRecord] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record: RequestRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarizes the recorded requests.
+
+        Returns:
+            Dict[str, Any]: The number of requests, retries and throttled
+                attempts, the statuses, the bytes received, the p50 and p95
+                latency and the time spent waiting, in seconds.
+        """
+        with self._lock:
+            records = list(self.records)
+        latencies = sorted(record.latency for record in records)
+        return {
+            "requests": len(records),
+            "retries": sum(record.retries for record in records),
+            "throttles": sum(record.throttles for record in records),
+            "statuses": dict(Counter(str(record.status) for record in records)),
+            "endpoints": dict(Counter(record.endpoint for record in records)),
+            "bytes": sum(record.bytes for record in records),
+            "latency_p50": round(_percentile(latencies, 50), 4),
+            "latency_p95": round(_percentile(latencies, 95), 4),
+            "latency_total": round(sum(latencies), 3),
+            "wait_time": round(sum(record.wait_time for record in records), 3),
+            "max_cursor_depth": max(
+                (record.cursor_depth for record in records), default=0
+            ),
+        }
+
+    def log_summary(self) -> Dict[str, Any]:
+        """Logs the summary as a single JSON line, parsed into a structured
+        entry by Cloud Logging.
+
+        Returns:
+            Dict[str, Any]: The logged summary.
+        """
+        summary = self.summary()
+        logger.info(
+            json.dumps({"message": "Notion request summary", "notion": summary})
+        )
+        return summary
+
+    def write(
+        self,
+        directory: str,
+        file_name: str = SUMMARY_FILE_NAME,
+        filesystem: Optional[AbstractFileSystem] = None,
+    ) -> str:
+        """Writes the summary and the recorded requests to a JSON file.
+
+        Args:
+            directory (str): The directory to write to, e.g. a folder of the
+                destination bucket.
+            file_name (str): The name of the file.
+            filesystem (AbstractFileSystem, optional): The filesystem of the
+                directory, e.g. the client of the destination bucket. Defaults
+                to the local filesystem.
+
+        Returns:
+            str: The path of the written file.
+        """
+        filesystem = filesystem or LocalFileSystem()
+        with self._lock:
+            records = [record._asdict() for record in self.records]
+        path = f"{directory.rstrip('/')}/{file_name}"
+        filesystem.makedirs(directory, exist_ok=True)
+        with filesystem.open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "requests": records}, f)
+        return path
@@ -1,3 +1,16 @@
 """Notion source settings and constants"""
 
 API_URL = "https://api.notion.com/v1"
+
+# max number of pooled keep-alive connections to the Notion API
+DEFAULT_MAX_CONNECTIONS = 10
+# Notion allows an average of 3 requests per second per integration
+DEFAULT_REQUESTS_PER_SECOND = 3.0
+# max number of concurrent block requests when loading pages
+DEFAULT_MAX_WORKERS = 4
+# max number of requests in flight, shrunk when throttled by the API
+DEFAULT_MAX_CONCURRENCY = 3
+# max number of attempts of a request throttled or failed by the API
+DEFAULT_MAX_ATTEMPTS = 5
+# number of pages per database query, the max allowed by Notion
+DEFAULT_PAGE_SIZE = 100